@@ -1,10 +1,20 @@
 # accounts/models.py
+import re
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+YEARS_EXPERIENCE_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+
+def parse_years_experience(text) -> int:
+    # "3 years building...", "5+ yrs", "10 year" -> largest number of years mentioned
+    if not text:
+        return 0
+    return max((int(n) for n in YEARS_EXPERIENCE_RE.findall(text)), default=0)
+
 class Profile(models.Model):
     class Visibility(models.TextChoices):
         PUBLIC = "PUBLIC", "Public"
@@ -37,6 +47,8 @@ class Profile(models.Model):
     phone = models.CharField(max_length=30, blank=True)
     education = models.TextField(blank=True)
     experience = models.TextField(blank=True)
+    # derived from `experience` on save so searches can use an indexed range filter
+    years_experience = models.PositiveSmallIntegerField(default=0, db_index=True)
     resume_url = models.URLField(blank=True)
     location = models.CharField(max_length=255, blank=True, null=True)
     skills = models.TextField(blank=True, null=True)
@@ -46,10 +58,19 @@ class Profile(models.Model):
 
     #users last action
     last_active = models.DateTimeField(null=True, blank=True)
+    # last profile edit, used by saved-search runs to only rescan changed profiles
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} - {'Recruiter' if self.is_recruiter else 'Candidate'}"
 
+    def save(self, *args, **kwargs):
+        self.years_experience = parse_years_experience(self.experience)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "experience" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "years_experience"}
+        super().save(*args, **kwargs)
+
     # Simple policy helper
     def can_view(self, viewer, field_key: str) -> bool:
         # Owner/Admin always see all fields
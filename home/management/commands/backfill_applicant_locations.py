@@ -0,0 +1,55 @@
+"""
+Management command to populate Application.applicant_location/applicant_lat/applicant_lng
+from each applicant's profile, for applications submitted before they were recorded.
+"""
+from django.core.management.base import BaseCommand
+from home.models import Application
+from home.services.applicant_locations import fill_from_profile
+
+
+class Command(BaseCommand):
+    help = 'Store applicant location and coordinates on existing applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of applications updated per query',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every application, not only those without coordinates',
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Only use the bundled gazetteer and geocode cache, never the geocoder backend',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        allow_lookup = not options['offline']
+        fields = ['applicant_location', 'applicant_lat', 'applicant_lng']
+        changed = []
+        updated = 0
+
+        applications = Application.objects.select_related('applicant__profile').order_by('id')
+        if not options['all']:
+            applications = applications.filter(applicant_lat__isnull=True)
+        for app in applications.iterator(chunk_size=batch_size):
+            profile = getattr(app.applicant, 'profile', None)
+            if fill_from_profile(app, profile, allow_lookup):
+                changed.append(app)
+            if len(changed) >= batch_size:
+                Application.objects.bulk_update(changed, fields)
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            Application.objects.bulk_update(changed, fields)
+            updated += len(changed)
+
+        located = Application.objects.filter(applicant_lat__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated {updated} applications ({located} now have coordinates)'))
@@ -0,0 +1,39 @@
+"""
+Management command to populate Profile.years_experience from the free-text experience field.
+"""
+from django.core.management.base import BaseCommand
+from accounts.models import Profile, parse_years_experience
+
+
+class Command(BaseCommand):
+    help = 'Recompute years_experience for every profile from its experience text'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of profiles updated per query',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        changed = []
+        updated = 0
+
+        profiles = Profile.objects.only('id', 'experience', 'years_experience').order_by('id')
+        for profile in profiles.iterator(chunk_size=batch_size):
+            years = parse_years_experience(profile.experience)
+            if years != profile.years_experience:
+                profile.years_experience = years
+                changed.append(profile)
+            if len(changed) >= batch_size:
+                Profile.objects.bulk_update(changed, ['years_experience'])
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            Profile.objects.bulk_update(changed, ['years_experience'])
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated years_experience on {updated} profiles'))
@@ -0,0 +1,19 @@
+"""
+Management command to write the gzip GeoJSON job map snapshots and their manifest.
+
+Job changes schedule a debounced rebuild in the background (MAP_SNAPSHOT_ASYNC); run
+this from a deploy hook or cron to build the first snapshot and when that is disabled.
+"""
+from django.core.management.base import BaseCommand
+from home.services.map_snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Write the full and per-category GeoJSON job map snapshots'
+
+    def handle(self, *args, **options):
+        manifest = build_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Wrote snapshot of {manifest["all"]["count"]} jobs '
+            f'({len(manifest["categories"])} category variants): {manifest["all"]["name"]}'
+        ))
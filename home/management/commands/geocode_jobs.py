@@ -1,11 +1,50 @@
 """
 Management command to geocode all jobs that don't have coordinates.
+
+Jobs are grouped by normalized location so each distinct address is resolved once.
+Addresses missing from the geocode cache are looked up concurrently behind a
+token-bucket rate limiter, failed lookups are retried with exponential backoff, and
+coordinates are written back with chunked bulk_update.
 """
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from home.models import Job
-import requests
+import random
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from home.models import GeocodeCacheEntry, Job, job_geohash
+from home.services.geocoding import (
+    cached_coordinates, cached_not_found, lookup_uncached, normalize_address, remember,
+)
+from home.services.map_clusters import rebuild_map_clusters
+from home.services.map_snapshots import build_snapshots
+
+Status = GeocodeCacheEntry.Status
+UPDATE_FIELDS = ['latitude', 'longitude', 'geohash', 'geocode_status']
+
+
+class TokenBucket:
+    """Blocking rate limiter: at most `rate` acquisitions per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
 
 class Command(BaseCommand):
@@ -17,96 +56,145 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be geocoded without making changes',
         )
-
-    def geocode_location(self, address):
-        """Geocode an address using Google Maps API."""
-        if not address:
-            return None, None
-
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
-        params = {"address": address, "key": settings.GOOGLE_MAPS_API_KEY}
-
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-
-            if data["status"] == "OK":
-                loc = data["results"][0]["geometry"]["location"]
-                return float(loc["lat"]), float(loc["lng"])
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'    Geocoding failed for "{address}": {data["status"]} - {data.get("error_message", "")}'
-                    )
-                )
-                return None, None
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'    Error geocoding "{address}": {str(e)}')
-            )
-            return None, None
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Concurrent geocoding requests',
+        )
+        parser.add_argument(
+            '--qps',
+            type=float,
+            default=40.0,
+            help='Maximum provider requests per second',
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=3,
+            help='Retries per address after a transient provider error',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Jobs written per bulk_update',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        
-        # Find jobs without coordinates
+
+        # Find jobs without coordinates, grouped by normalized location
         jobs_to_geocode = Job.objects.filter(latitude__isnull=True) | Job.objects.filter(longitude__isnull=True)
-        total_jobs = jobs_to_geocode.count()
+        jobs_by_address = defaultdict(list)
+        addresses = {}
+        skipped_count = 0
+        total_jobs = 0
+        for job_id, location in jobs_to_geocode.values_list('id', 'location').iterator():
+            total_jobs += 1
+            key = normalize_address(location)
+            if not key or key == 'remote':
+                skipped_count += 1
+                continue
+            jobs_by_address[key].append(job_id)
+            addresses.setdefault(key, location.strip())
 
         if total_jobs == 0:
             self.stdout.write(self.style.SUCCESS('All jobs already have coordinates!'))
             return
 
-        self.stdout.write(f'Found {total_jobs} jobs without coordinates')
-        
+        self.stdout.write(
+            f'Found {total_jobs} jobs without coordinates at {len(addresses)} distinct locations'
+        )
         if dry_run:
             self.stdout.write(self.style.WARNING('\n🔍 DRY RUN MODE - No changes will be made\n'))
 
-        geocoded_count = 0
-        failed_count = 0
-        skipped_count = 0
+        resolved = cached_coordinates(addresses.values())
+        # negatively cached addresses stay failed until their entry expires
+        not_found = cached_not_found(addresses.values())
+        self.stdout.write(
+            f'  {len(resolved)} locations already in the geocode cache, {len(not_found)} cached as not found'
+        )
 
-        for i, job in enumerate(jobs_to_geocode, 1):
-            self.stdout.write(f'\n[{i}/{total_jobs}] Processing: "{job.title}" at "{job.location}"')
-            
-            if not job.location or job.location.lower() == 'remote':
-                self.stdout.write(self.style.WARNING(f'    Skipping (Remote or no location)'))
-                skipped_count += 1
-                continue
+        pending = [key for key in addresses if key not in resolved and key not in not_found]
+        if pending:
+            self.stdout.write(
+                f'  Geocoding {len(pending)} locations with {options["workers"]} workers at ≤{options["qps"]:g} req/s...'
+            )
+            resolved.update(self._resolve(pending, addresses, options, dry_run))
 
-            lat, lng = self.geocode_location(job.location)
-            
-            if lat is not None and lng is not None:
-                self.stdout.write(
-                    self.style.SUCCESS(f'    ✓ Geocoded: {lat}, {lng}')
-                )
-                
-                if not dry_run:
-                    job.latitude = lat
-                    job.longitude = lng
-                    job.save(update_fields=['latitude', 'longitude'])
-                    self.stdout.write(self.style.SUCCESS(f'    ✓ Saved to database'))
-                
-                geocoded_count += 1
-                
-                # Rate limiting: sleep to avoid hitting API limits
-                if i < total_jobs:
-                    time.sleep(0.2)  # 5 requests per second max
+        geocoded_count = 0
+        failed_count = 0
+        batch = []
+        for key, job_ids in jobs_by_address.items():
+            coords = resolved.get(key)
+            if coords is None or coords[0] is None:
+                failed_count += len(job_ids)
+                coords, status = (None, None), Job.GeocodeStatus.FAILED
             else:
-                failed_count += 1
+                geocoded_count += len(job_ids)
+                status = Job.GeocodeStatus.OK
+            geohash = job_geohash(*coords)
+            batch.extend(
+                Job(id=job_id, latitude=coords[0], longitude=coords[1], geohash=geohash, geocode_status=status)
+                for job_id in job_ids
+            )
+            if len(batch) >= options['batch_size'] and not dry_run:
+                Job.objects.bulk_update(batch, UPDATE_FIELDS)
+                batch = []
+        if batch and not dry_run:
+            Job.objects.bulk_update(batch, UPDATE_FIELDS)
+        if geocoded_count and not dry_run:
+            # bulk_update bypasses the signals that maintain the map clusters
+            cells = rebuild_map_clusters()
+            self.stdout.write(f'  Rebuilt {cells} map cluster cells')
+            manifest = build_snapshots()
+            self.stdout.write(f'  Wrote map snapshots for {len(manifest["categories"])} categories')
 
         # Summary
         self.stdout.write('\n' + '=' * 70)
         self.stdout.write(self.style.SUCCESS('GEOCODING SUMMARY'))
         self.stdout.write('=' * 70)
         self.stdout.write(f'Total jobs processed: {total_jobs}')
+        self.stdout.write(f'Distinct locations: {len(addresses)} ({len(pending)} sent to the geocoder)')
         self.stdout.write(self.style.SUCCESS(f'Successfully geocoded: {geocoded_count}'))
         if failed_count > 0:
             self.stdout.write(self.style.WARNING(f'Failed to geocode: {failed_count}'))
         if skipped_count > 0:
             self.stdout.write(self.style.WARNING(f'Skipped (remote/no location): {skipped_count}'))
-        
+
         if dry_run:
             self.stdout.write(self.style.WARNING('\nℹ️  This was a dry run. Run without --dry-run to save changes.'))
         else:
             self.stdout.write(self.style.SUCCESS('\n✓ All changes saved to database!'))
+
+    def _resolve(self, keys, addresses, options, dry_run):
+        bucket = TokenBucket(options['qps'])
+        retries = options['retries']
+
+        def lookup(address):
+            # Runs in worker threads: provider I/O only, all DB writes stay on the main thread
+            for attempt in range(retries + 1):
+                bucket.acquire()
+                status, lat, lng = lookup_uncached(address)
+                if status != Status.ERROR:
+                    break
+                if attempt < retries:
+                    time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.25))
+            return status, lat, lng
+
+        resolved = {}
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            futures = {pool.submit(lookup, addresses[key]): key for key in keys}
+            for done, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                status, lat, lng = future.result()
+                if not dry_run:
+                    remember(addresses[key], status, lat, lng)
+                if status == Status.OK:
+                    resolved[key] = (lat, lng)
+                else:
+                    self.stdout.write(self.style.WARNING(f'    Geocoding failed for "{addresses[key]}": {status}'))
+                if done % 100 == 0:
+                    self.stdout.write(f'    {done}/{len(keys)} locations resolved')
+        return resolved
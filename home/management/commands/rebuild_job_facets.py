@@ -0,0 +1,16 @@
+"""
+Management command to rebuild the precomputed job facet counts from the Job table.
+
+Counts are maintained incrementally on Job save/delete; run this after bulk imports
+that bypass model signals (QuerySet.update, bulk_create, raw SQL).
+"""
+from django.core.management.base import BaseCommand
+from home.services.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild JobFacetCount rows (category, location, salary bucket) from scratch'
+
+    def handle(self, *args, **options):
+        rows = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {rows} facet values'))
@@ -0,0 +1,16 @@
+"""
+Management command to rebuild the precomputed job map clusters from the Job table.
+
+Cells are maintained incrementally on Job save/delete and by the background geocoder;
+run this after bulk imports that bypass model signals (QuerySet.update, bulk_create, raw SQL).
+"""
+from django.core.management.base import BaseCommand
+from home.services.map_clusters import rebuild_map_clusters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild JobMapCell rows (per-zoom grid cells by category) from scratch'
+
+    def handle(self, *args, **options):
+        cells = rebuild_map_clusters()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {cells} map cluster cells'))
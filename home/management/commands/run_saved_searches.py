@@ -0,0 +1,131 @@
+"""
+Management command to evaluate active saved candidate searches and email digests.
+
+Meant to be run from cron or a systemd timer, e.g. every 15 minutes:
+
+    python manage.py run_saved_searches --workers 4
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from home.models import SavedCandidateSearch
+from home.services.saved_searches import pending_digest_matches, record_new_matches
+
+
+def _evaluate_chunk(search_ids):
+    """Run one chunk of searches; returns {search_id: new match count}."""
+    close_old_connections()
+    results = {}
+    for s in SavedCandidateSearch.objects.filter(pk__in=search_ids, is_active=True):
+        results[s.pk] = len(record_new_matches(s, since=s.last_run_at))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Run all active saved candidate searches and send one digest email per owner'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes used to evaluate searches (1 = in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50,
+            help='Number of searches handed to a worker at a time',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rescan every candidate profile instead of only those changed since the last run',
+        )
+        parser.add_argument(
+            '--no-email',
+            action='store_true',
+            help='Record matches without sending digest emails',
+        )
+
+    def handle(self, *args, **options):
+        search_ids = list(
+            SavedCandidateSearch.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)
+        )
+        if not search_ids:
+            self.stdout.write(self.style.SUCCESS('No active saved searches.'))
+            return
+
+        if options['full']:
+            SavedCandidateSearch.objects.filter(pk__in=search_ids).update(last_run_at=None)
+
+        chunk_size = max(1, options['chunk_size'])
+        chunks = [search_ids[i:i + chunk_size] for i in range(0, len(search_ids), chunk_size)]
+        self.stdout.write(f'Evaluating {len(search_ids)} searches in {len(chunks)} chunks...')
+
+        new_total = 0
+        for results in self._evaluate(chunks, options['workers']):
+            new_total += sum(results.values())
+        self.stdout.write(self.style.SUCCESS(f'✓ Recorded {new_total} new matches'))
+
+        if not options['no_email']:
+            self._send_digests(search_ids)
+
+    def _evaluate(self, chunks, workers):
+        if workers <= 1 or len(chunks) == 1:
+            for chunk in chunks:
+                yield _evaluate_chunk(chunk)
+            return
+
+        # Forked workers must not share the parent's open DB connection.
+        connections.close_all()
+        ctx = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            yield from pool.map(_evaluate_chunk, chunks)
+
+    def _send_digests(self, search_ids):
+        notified_at = timezone.now()
+        by_owner = OrderedDict()
+        for match in pending_digest_matches(search_ids):
+            owner = match.search.owner
+            by_owner.setdefault(owner.pk, (owner, OrderedDict()))
+            by_owner[owner.pk][1].setdefault(match.search, []).append(match)
+
+        emails = []
+        notified_search_ids = []
+        for owner, searches in by_owner.values():
+            notified_search_ids.extend(s.pk for s in searches)
+            if not owner.email:
+                continue
+            emails.append(EmailMessage(
+                subject=f'{sum(len(m) for m in searches.values())} new candidate matches',
+                body=self._digest_body(owner, searches),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[owner.email],
+            ))
+
+        if emails:
+            get_connection().send_messages(emails)
+        if notified_search_ids:
+            SavedCandidateSearch.objects.filter(pk__in=notified_search_ids).update(
+                last_notified_at=notified_at
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ Sent {len(emails)} digest emails'))
+
+    def _digest_body(self, owner, searches):
+        lines = [f'Hi {owner.first_name or owner.username},', '']
+        for s, matches in searches.items():
+            lines.append(f'{s.name}: {len(matches)} new')
+            for m in matches:
+                profile = m.candidate.profile
+                lines.append(f'  - {profile.headline or m.candidate.username}')
+            lines.append('')
+        lines.append('Open your saved searches to review them.')
+        return '\n'.join(lines)
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:57
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# Frozen copy of home.services.facets.facet_values as of this migration
+SALARY_BUCKETS = [
+    ('0-50k', 0, 50000),
+    ('50k-100k', 50000, 100000),
+    ('100k-150k', 100000, 150000),
+    ('150k+', 150000, None),
+]
+
+
+def salary_bucket(salary):
+    salary = Decimal(salary or 0)
+    for key, lo, hi in SALARY_BUCKETS:
+        if salary >= lo and (hi is None or salary < hi):
+            return key
+    return SALARY_BUCKETS[0][0]
+
+
+def facet_values(category, location, salary):
+    pairs = {('salary', salary_bucket(salary))}
+    if (category or '').strip():
+        pairs.add(('category', category.strip()[:255]))
+    if (location or '').strip():
+        pairs.add(('location', location.strip()[:255]))
+    return pairs
+
+
+def seed_facet_counts(apps, schema_editor):
+    Job = apps.get_model('home', 'Job')
+    JobFacetCount = apps.get_model('home', 'JobFacetCount')
+    totals = Counter()
+    for category, location, salary in Job.objects.values_list('category', 'location', 'salary').iterator():
+        totals.update(facet_values(category, location, salary))
+    JobFacetCount.objects.bulk_create(
+        [JobFacetCount(facet=facet, value=value, count=n) for (facet, value), n in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_rename_longtitude_job_longitude'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('location', 'Location'), ('salary', 'Salary')], max_length=16)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', '-count'], name='home_jobfac_facet_62ab84_idx')],
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(seed_facet_counts, migrations.RunPython.noop),
+    ]
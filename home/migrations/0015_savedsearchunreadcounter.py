@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_unread_counters(apps, schema_editor):
+    SavedCandidateMatch = apps.get_model('home', 'SavedCandidateMatch')
+    SavedSearchUnreadCounter = apps.get_model('home', 'SavedSearchUnreadCounter')
+    totals = (
+        SavedCandidateMatch.objects.filter(seen=False)
+        .values('search__owner_id')
+        .annotate(n=Count('id'))
+    )
+    SavedSearchUnreadCounter.objects.bulk_create(
+        [SavedSearchUnreadCounter(owner_id=row['search__owner_id'], unread=row['n']) for row in totals],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0014_jobfacetcount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchUnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_unread', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(seed_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+
+def set_initial_geocode_status(apps, schema_editor):
+    Job = apps.get_model('home', 'Job')
+    Job.objects.filter(latitude__isnull=False, longitude__isnull=False).update(geocode_status='OK')
+    Job.objects.filter(location='').update(geocode_status='SKIPPED')
+    Job.objects.filter(location__iexact='remote').update(geocode_status='SKIPPED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0016_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geocode_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('OK', 'Located'), ('FAILED', 'Not found'), ('SKIPPED', 'No location')], db_index=True, default='PENDING', max_length=8),
+        ),
+        migrations.RunPython(set_initial_geocode_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:13
+
+import math
+from collections import Counter
+
+from django.db import migrations, models
+
+
+# Frozen copy of home.services.map_clusters.job_cells as of this migration
+MAX_CLUSTER_ZOOM = 12
+CELL_PIXELS = 64
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def cell_for(lat, lng, zoom):
+    n = (256 // CELL_PIXELS) << zoom
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    phi = math.radians(lat)
+    y = int((1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def job_cells(latitude, longitude, category):
+    category = (category or '').strip()[:255]
+    return [(zoom, *cell_for(latitude, longitude, zoom), category) for zoom in range(MAX_CLUSTER_ZOOM + 1)]
+
+
+def seed_map_cells(apps, schema_editor):
+    Job = apps.get_model('home', 'Job')
+    JobMapCell = apps.get_model('home', 'JobMapCell')
+    counts, lat_sums, lng_sums = Counter(), Counter(), Counter()
+    rows = Job.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+        'latitude', 'longitude', 'category'
+    )
+    for lat, lng, category in rows.iterator():
+        for key in job_cells(lat, lng, category):
+            counts[key] += 1
+            lat_sums[key] += lat
+            lng_sums[key] += lng
+    JobMapCell.objects.bulk_create(
+        [
+            JobMapCell(
+                zoom=zoom, x=x, y=y, category=category,
+                count=n, lat_sum=lat_sums[zoom, x, y, category], lng_sum=lng_sums[zoom, x, y, category],
+            )
+            for (zoom, x, y, category), n in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_job_lat_lng_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobMapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('x', models.PositiveIntegerField()),
+                ('y', models.PositiveIntegerField()),
+                ('category', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('lat_sum', models.FloatField(default=0)),
+                ('lng_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['zoom', 'y', 'x'], name='home_jobmap_zoom_a8c80d_idx')],
+                'unique_together': {('zoom', 'x', 'y', 'category')},
+            },
+        ),
+        migrations.RunPython(seed_map_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0019_jobmapcell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'applicant_location'], name='home_applic_job_id_01304a_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:18
+
+from django.db import migrations, models
+
+
+# Frozen copy of home.services.geo.encode_geohash at precision 9, so this migration
+# keeps producing the same values whatever later happens to the live helper.
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(lat, lng, precision=9):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            value = value * 2 + (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def fill_geohash(apps, schema_editor):
+    Job = apps.get_model('home', 'Job')
+    jobs = []
+    for job in Job.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude'):
+        job.geohash = encode_geohash(job.latitude, job.longitude)
+        jobs.append(job)
+    Job.objects.bulk_update(jobs, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0020_application_location_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:30
+
+from django.db import migrations
+from django.db.models.functions import Trim
+
+
+def strip_facet_values(apps, schema_editor):
+    # JobFacetCount already holds trimmed values; make the columns match them
+    Job = apps.get_model('home', 'Job')
+    Job.objects.update(category=Trim('category'), location=Trim('location'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0021_job_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_facet_values, migrations.RunPython.noop),
+    ]
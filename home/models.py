@@ -1,11 +1,26 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-import requests
 from django.conf import settings
 
+
+def job_geohash(latitude, longitude) -> str:
+    # imported here: home.services modules import these models
+    from home.services.geo import encode_geohash
+
+    if latitude is None or longitude is None:
+        return ""
+    return encode_geohash(latitude, longitude)
+
+
 # Create your models here.
 class Job(models.Model):
+    class GeocodeStatus(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        OK = "OK", "Located"
+        FAILED = "FAILED", "Not found"
+        SKIPPED = "SKIPPED", "No location"
+
     id = models.AutoField(primary_key=True)
     date = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -17,7 +32,29 @@ class Job(models.Model):
     #extra info for map api
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # set by the background geocoder (home/services/geocode_queue.py)
+    geocode_status = models.CharField(
+        max_length=8, choices=GeocodeStatus.choices, default=GeocodeStatus.PENDING, db_index=True
+    )
+    # derived from latitude/longitude on save; nearest-job queries scan geohash cell ranges
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
+
+    class Meta:
+        indexes = [
+            # bounding-box prefilter for map radius queries (home/services/geo.py)
+            models.Index(fields=["latitude", "longitude"], name="home_job_lat_lng_idx"),
+        ]
     
+    def save(self, *args, **kwargs):
+        # facet values are stored trimmed so facet drill-down matches the column exactly
+        self.category = (self.category or "").strip()
+        self.location = (self.location or "").strip()
+        self.geohash = job_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"}.intersection(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return str(self.id) + ' - ' + self.title
 
@@ -46,6 +83,10 @@ class Application(models.Model):
     class Meta:
         unique_together = ("job", "applicant")
         ordering = ["-created_at"]
+        indexes = [
+            # applicant map: GROUP BY location per job
+            models.Index(fields=["job", "applicant_location"]),
+        ]
 
     def __str__(self):
         return f"{self.applicant.username} -> {self.job.title}"
@@ -138,14 +179,88 @@ class SavedCandidateMatch(models.Model):
         return f"{self.search.name} -> {self.candidate.username}"
 
 
+# Denormalized count of unseen saved-search matches per recruiter, so the navbar badge
+# poll does not join and count SavedCandidateMatch; see home/services/notifications.py.
+class SavedSearchUnreadCounter(models.Model):
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name="saved_search_unread")
+    unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner.username}: {self.unread} unread"
+
+# Persistent geocoding results keyed by normalized address, shared by every geocode call
+# site through home/services/geocoding.py. Failures are stored too (negative caching),
+# with a shorter expiry than successful lookups.
+class GeocodeCacheEntry(models.Model):
+    class Status(models.TextChoices):
+        OK = "OK", "OK"
+        NOT_FOUND = "NOT_FOUND", "Not found"
+        ERROR = "ERROR", "Error"
 
+    address_key = models.CharField(max_length=255, unique=True)
+    address = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=Status.choices)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
 
-def geocode_location(address):
-    api_key = settings.GOOGLE_MAPS_API_KEY
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?address={address}&key={api_key}"
-    response = requests.get(url).json()
+    def __str__(self):
+        return f"{self.address} -> {self.status}"
 
-    if response['status'] == 'OK':
-        location = response['results'][0]['geometry']['location']
-        return location['lat'], location['lng']
-    return None, None
\ No newline at end of file
+# Precomputed facet counts for the job index (category / location / salary bucket).
+# Maintained incrementally by the Job signals in home/signals.py so facet navigation
+# never needs a GROUP BY over the job table; see home/services/facets.py.
+class JobFacetCount(models.Model):
+    class Facet(models.TextChoices):
+        CATEGORY = "category", "Category"
+        LOCATION = "location", "Location"
+        SALARY = "salary", "Salary"
+
+    facet = models.CharField(max_length=16, choices=Facet.choices)
+    value = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("facet", "value")
+        indexes = [
+            models.Index(fields=["facet", "-count"]),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
+
+# Precomputed map clusters: jobs per (zoom, grid cell, category) on a Web Mercator grid,
+# maintained incrementally by home/signals.py and rebuilt by `rebuild_map_clusters`.
+class JobMapCell(models.Model):
+    zoom = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    category = models.CharField(max_length=255, blank=True, default="")
+    count = models.PositiveIntegerField(default=0)
+    # sums of member coordinates; centroid = sum / count
+    lat_sum = models.FloatField(default=0)
+    lng_sum = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("zoom", "x", "y", "category")
+        indexes = [
+            models.Index(fields=["zoom", "y", "x"]),
+        ]
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.x}, {self.y}) {self.category or '-'}: {self.count}"
+
+
+# Named version counters shared by every worker process (e.g. the job-search cache
+# generation). Bumped with F() so concurrent writers never lose an increment; see
+# home/services/versions.py.
+class SharedVersion(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
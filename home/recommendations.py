@@ -5,6 +5,8 @@
 from django.db.models import Q
 from .models import Job, CandidateRecommendation, JobRecommendation
 from accounts.models import Profile
+from home.services import distance
+from home.services.geocoding import cached_coordinates, normalize_address
 
 
 # PSEUDOCODE: Improved skill matching using multiple signals
@@ -92,6 +94,21 @@ def calculate_location_match(profile_location, job_location):
         return 0
 
 
+# PSEUDOCODE: Scores distance in miles on the same scale as calculate_location_match
+# Returns 100 within NEARBY_MILES, 50 within REGION_MILES, 0 otherwise or if unknown
+NEARBY_MILES = 25
+REGION_MILES = 100
+
+def calculate_distance_match(miles):
+    if miles is None:
+        return 0
+    if miles <= NEARBY_MILES:
+        return 100
+    elif miles <= REGION_MILES:
+        return 50
+    return 0
+
+
 # PSEUDOCODE: Finds top candidates for a job posting based on skills/location
 # Filters profiles by recruiter visibility settings, calculates composite match score
 # Creates/updates CandidateRecommendation records for top 10 matches (score > 20)
@@ -207,13 +224,22 @@ def generate_job_recommendations(user):
     
     profile_text = " ".join(profile_text_parts)
 
+    # Distances from the candidate to every geocoded job in one pass (cached lookups only)
+    miles_by_job = {}
+    origin = cached_coordinates([profile.location or ""]).get(normalize_address(profile.location))
+    if origin is not None:
+        miles_by_job = distance.job_distances(*origin)
+
     for job in jobs:
         # Calculate match scores
         skill_score = calculate_skill_match(
             profile_text,
             job.description + " " + job.title + " " + job.category
         )
-        location_score = calculate_location_match(profile.location or "", job.location)
+        location_score = max(
+            calculate_location_match(profile.location or "", job.location),
+            calculate_distance_match(miles_by_job.get(job.id)),
+        )
 
         # Weighted composite score: 75% skills/experience/education, 25% location
         composite_score = int((skill_score * 0.75) + (location_score * 0.25))
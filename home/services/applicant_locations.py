@@ -0,0 +1,34 @@
+from home.services.geocoders import bundled_gazetteer
+from home.services.geocoding import cached_coordinates, geocode, normalize_address
+
+# Applicant coordinates are stored on Application when the candidate applies, so the
+# recruiter map can GROUP BY them instead of resolving profile locations per request.
+# On the request path only offline sources are used (the bundled gazetteer, then the
+# geocode cache table); the backfill command may also ask the geocoder backend.
+
+
+def resolve(location, allow_lookup=False):
+    """(lat, lng) for a profile location, or (None, None) if it is unknown."""
+    if not normalize_address(location):
+        return None, None
+    coords = bundled_gazetteer().coordinates(location)
+    if coords is not None:
+        return coords
+    coords = cached_coordinates([location]).get(normalize_address(location))
+    if coords is not None:
+        return coords
+    if allow_lookup:
+        return geocode(location)
+    return None, None
+
+def fill_from_profile(application, profile, allow_lookup=False) -> bool:
+    """Copy the applicant's location and coordinates onto the application; True if changed."""
+    location = ((profile.location if profile is not None else None) or "").strip()[:100]
+    lat, lng = resolve(location, allow_lookup) if location else (None, None)
+    current = (application.applicant_location, application.applicant_lat, application.applicant_lng)
+    if current == (location, lat, lng):
+        return False
+    application.applicant_location = location
+    application.applicant_lat = lat
+    application.applicant_lng = lng
+    return True
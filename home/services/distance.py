@@ -0,0 +1,118 @@
+import heapq
+import math
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # listed in requirements.txt; the pure-Python path gives the same answers
+    np = None
+
+from home.models import Job
+from home.services.geo import EARTH_RADIUS_MILES
+
+# Distance queries over every geocoded job. Coordinates live in contiguous float
+# arrays (radians, cos(lat) precomputed) that are built once per process and
+# rebuilt after Job signals mark them stale, so a k-nearest or distance-map query
+# is one vectorized haversine pass instead of a Python call per row.
+MAX_AGE_SECONDS = 600  # queryset .update()/bulk_update skip signals; rebuild periodically
+
+
+def distances_from(lat, lng, lats, lngs):
+    """Haversine miles from (lat, lng) to each point of the lats/lngs sequences (degrees)."""
+    if np is not None:
+        lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+        lng2 = np.radians(np.asarray(lngs, dtype=np.float64))
+        return _haversine_np(math.radians(lat), math.radians(lng), lat2, lng2, np.cos(lat2))
+    lat2 = [math.radians(v) for v in lats]
+    lng2 = [math.radians(v) for v in lngs]
+    return _haversine_py(math.radians(lat), math.radians(lng), lat2, lng2, [math.cos(v) for v in lat2])
+
+def _haversine_np(lat1, lng1, lat2, lng2, cos_lat2):
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * cos_lat2 * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _haversine_py(lat1, lng1, lat2, lng2, cos_lat2):
+    cos_lat1 = math.cos(lat1)
+    out = []
+    for la, ln, cl in zip(lat2, lng2, cos_lat2):
+        a = math.sin((la - lat1) / 2) ** 2 + cos_lat1 * cl * math.sin((ln - lng1) / 2) ** 2
+        out.append(2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0))))
+    return out
+
+
+class JobCoordinates:
+    def __init__(self, rows):
+        ids, lats, lngs = array("q"), array("d"), array("d")
+        for job_id, lat, lng in rows:
+            ids.append(job_id)
+            lats.append(math.radians(lat))
+            lngs.append(math.radians(lng))
+        if np is not None:
+            self.ids = np.frombuffer(ids, dtype=np.int64) if ids else np.empty(0, dtype=np.int64)
+            self.lats = np.frombuffer(lats, dtype=np.float64) if lats else np.empty(0)
+            self.lngs = np.frombuffer(lngs, dtype=np.float64) if lngs else np.empty(0)
+            self.cos_lats = np.cos(self.lats)
+        else:
+            self.ids, self.lats, self.lngs = ids, lats, lngs
+            self.cos_lats = array("d", (math.cos(v) for v in lats))
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def distances(self, lat, lng):
+        """Miles from (lat, lng) to every job, aligned with self.ids."""
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        if np is not None:
+            return _haversine_np(lat1, lng1, self.lats, self.lngs, self.cos_lats)
+        return _haversine_py(lat1, lng1, self.lats, self.lngs, self.cos_lats)
+
+    def nearest(self, lat, lng, k, max_distance=None):
+        """The k closest jobs as [(job_id, miles)], optionally capped at max_distance."""
+        if k <= 0 or not len(self):
+            return []
+        miles = self.distances(lat, lng)
+        if np is not None:
+            k = min(k, len(miles))
+            top = np.argpartition(miles, k - 1)[:k]
+            top = top[np.argsort(miles[top], kind="stable")]
+            found = [(int(self.ids[i]), float(miles[i])) for i in top]
+        else:
+            found = [(self.ids[i], m) for m, i in heapq.nsmallest(k, ((m, i) for i, m in enumerate(miles)))]
+        if max_distance is not None:
+            found = [(job_id, m) for job_id, m in found if m <= max_distance]
+        return found
+
+    def distance_map(self, lat, lng):
+        """{job_id: miles} for every geocoded job."""
+        return dict(zip((int(i) for i in self.ids), (float(m) for m in self.distances(lat, lng))))
+
+
+_coordinates = None
+_stale = False
+_lock = threading.Lock()
+
+def get_coordinates():
+    global _coordinates, _stale
+    with _lock:
+        if _coordinates is None or _stale or time.monotonic() - _coordinates.built_at > MAX_AGE_SECONDS:
+            rows = Job.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+                "id", "latitude", "longitude"
+            )
+            _coordinates = JobCoordinates(rows.iterator())
+            _stale = False
+        return _coordinates
+
+def invalidate():
+    """Rebuild the coordinate arrays on next use (called from Job signals)."""
+    global _stale
+    with _lock:
+        _stale = True
+
+def nearest(lat, lng, k, max_distance=None):
+    return get_coordinates().nearest(lat, lng, k, max_distance)
+
+def job_distances(lat, lng):
+    return get_coordinates().distance_map(lat, lng)
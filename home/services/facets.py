@@ -0,0 +1,88 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from home.models import Job, JobFacetCount
+
+Facet = JobFacetCount.Facet
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+SALARY_BUCKETS = [
+    ("0-50k", "Under $50k", 0, 50000),
+    ("50k-100k", "$50k – $100k", 50000, 100000),
+    ("100k-150k", "$100k – $150k", 100000, 150000),
+    ("150k+", "$150k+", 150000, None),
+]
+SALARY_BUCKET_LABELS = {key: label for key, label, _, _ in SALARY_BUCKETS}
+
+def salary_bucket(salary) -> str:
+    salary = Decimal(salary or 0)
+    for key, _, lo, hi in SALARY_BUCKETS:
+        if salary >= lo and (hi is None or salary < hi):
+            return key
+    return SALARY_BUCKETS[0][0]
+
+def salary_bucket_q(key):
+    for bucket_key, _, lo, hi in SALARY_BUCKETS:
+        if bucket_key == key:
+            q = Q(salary__gte=lo)
+            if hi is not None:
+                q &= Q(salary__lt=hi)
+            return q
+    return None
+
+def facet_values(category, location, salary):
+    """The (facet, value) pairs a job with these attributes contributes to."""
+    pairs = {(Facet.SALARY.value, salary_bucket(salary))}
+    if (category or "").strip():
+        pairs.add((Facet.CATEGORY.value, category.strip()[:255]))
+    if (location or "").strip():
+        pairs.add((Facet.LOCATION.value, location.strip()[:255]))
+    return pairs
+
+def _shifted(delta: int):
+    # Clamped at zero: writes that bypass the signals (bulk imports, .update()) can
+    # leave a count behind, and a later delete must not trip the count >= 0 check.
+    return Greatest(F("count") + delta, 0)
+
+def apply_facet_delta(pairs, delta: int):
+    for facet, value in pairs:
+        updated = JobFacetCount.objects.filter(facet=facet, value=value).update(count=_shifted(delta))
+        if not updated and delta > 0:
+            _, created = JobFacetCount.objects.get_or_create(
+                facet=facet, value=value, defaults={"count": delta}
+            )
+            if not created:
+                JobFacetCount.objects.filter(facet=facet, value=value).update(count=_shifted(delta))
+
+def facet_counts(limit: int = 10):
+    """Top values per facet, read straight from the aggregate table."""
+    counts = {}
+    for facet in Facet:
+        rows = (
+            JobFacetCount.objects
+            .filter(facet=facet.value, count__gt=0)
+            .order_by("-count", "value")
+            .values_list("value", "count")
+        )
+        if facet == Facet.SALARY:
+            by_key = dict(rows)
+            counts[facet.value] = [
+                (key, SALARY_BUCKET_LABELS[key], by_key[key]) for key, _, _, _ in SALARY_BUCKETS if key in by_key
+            ]
+        else:
+            counts[facet.value] = [(value, value, count) for value, count in rows[:limit]]
+    return counts
+
+def rebuild_facet_counts() -> int:
+    """Recompute the whole table from Job; used to seed or repair it."""
+    totals = Counter()
+    for category, location, salary in Job.objects.values_list("category", "location", "salary").iterator():
+        totals.update(facet_values(category, location, salary))
+    JobFacetCount.objects.all().delete()
+    JobFacetCount.objects.bulk_create(
+        [JobFacetCount(facet=facet, value=value, count=n) for (facet, value), n in totals.items()],
+        batch_size=1000,
+    )
+    return len(totals)
@@ -0,0 +1,101 @@
+import math
+
+from django.db.models import Q
+
+# Great-circle helpers for the map endpoints. Radius queries first narrow rows with
+# a latitude/longitude bounding box that the (latitude, longitude) index on Job can
+# serve, then run exact haversine (home/services/distance.py) only on the rows that
+# survive.
+EARTH_RADIUS_MILES = 3958.8
+
+
+def bounding_box(lat, lng, radius_miles):
+    """
+    Smallest lat/lng box containing every point within radius_miles of (lat, lng).
+
+    Returns (min_lat, max_lat, min_lng, max_lng). Longitudes may fall outside
+    [-180, 180] when the box crosses the antimeridian; bounding_box_q() handles that.
+    """
+    angular = radius_miles / EARTH_RADIUS_MILES
+    min_lat = lat - math.degrees(angular)
+    max_lat = lat + math.degrees(angular)
+    if min_lat <= -90 or max_lat >= 90:
+        # circle covers a pole: every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, max_lat, -180.0, 180.0
+    dlng = math.degrees(math.asin(ratio))
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+def bounding_box_q(lat, lng, radius_miles, prefix=""):
+    """Q object selecting rows whose coordinates fall inside bounding_box()."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+    q = Q(**{f"{prefix}latitude__gte": min_lat, f"{prefix}latitude__lte": max_lat})
+    if min_lng < -180:
+        lng_q = Q(**{f"{prefix}longitude__gte": min_lng + 360}) | Q(**{f"{prefix}longitude__lte": max_lng})
+    elif max_lng > 180:
+        lng_q = Q(**{f"{prefix}longitude__gte": min_lng}) | Q(**{f"{prefix}longitude__lte": max_lng - 360})
+    else:
+        lng_q = Q(**{f"{prefix}longitude__gte": min_lng, f"{prefix}longitude__lte": max_lng})
+    return q & lng_q
+
+
+# Geohash: interleaved longitude/latitude bisection bits, 5 per base-32 character.
+# Cells sharing a prefix are nested, so one cell is a contiguous range of an index.
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m, what Job.geohash stores
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            value = value * 2 + (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def geohash_cell_size(precision):
+    """(height, width) in degrees of a geohash cell of this precision."""
+    total = 5 * precision
+    return 180.0 / 2 ** (total // 2), 360.0 / 2 ** (total - total // 2)
+
+def geohash_ring(lat, lng, precision, ring):
+    """Geohashes of the cells exactly `ring` steps away from the cell containing (lat, lng)."""
+    height, width = geohash_cell_size(precision)
+    if ring == 0:
+        return {encode_geohash(lat, lng, precision)}
+    # centre of the origin cell, so offsets land in the middle of neighbouring cells
+    origin = encode_geohash(lat, lng, precision)
+    lat_c = (math.floor((lat + 90) / height) + 0.5) * height - 90
+    lng_c = (math.floor((lng + 180) / width) + 0.5) * width - 180
+    cells = set()
+    for dy in range(-ring, ring + 1):
+        for dx in range(-ring, ring + 1):
+            if max(abs(dx), abs(dy)) != ring:
+                continue
+            cell_lat = lat_c + dy * height
+            if not -90 < cell_lat < 90:
+                continue
+            cell_lng = (lng_c + dx * width + 180) % 360 - 180
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    cells.discard(origin)
+    return cells
+
+def geohash_prefix_q(cells, field="geohash"):
+    """Q matching rows whose geohash lies in any of the cells (index range scans)."""
+    q = Q()
+    for cell in cells:
+        q |= Q(**{f"{field}__gte": cell, f"{field}__lt": cell + "~"})
+    return q
@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from home.models import Job, job_geohash
+from home.services import distance, map_clusters, map_snapshots
+from home.services.geocoding import geocode, normalize_address
+
+# Background geocoding for job saves. Views store the location immediately and call
+# enqueue_job_geocode(); a daemon thread in this process resolves the coordinates
+# after the transaction commits and updates latitude/longitude/geocode_status.
+# Anything lost on restart stays PENDING and is picked up by `geocode_jobs`.
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def needs_geocoding(location) -> bool:
+    key = normalize_address(location)
+    return bool(key) and key != "remote"
+
+def initial_status(location):
+    return Job.GeocodeStatus.PENDING if needs_geocoding(location) else Job.GeocodeStatus.SKIPPED
+
+def geocode_job(job_id):
+    row = Job.objects.filter(pk=job_id).values_list("location", "latitude", "longitude", "category").first()
+    if row is None:
+        return
+    location, old_lat, old_lng, category = row
+    lat, lng = geocode(location)
+    status = Job.GeocodeStatus.OK if lat is not None and lng is not None else Job.GeocodeStatus.FAILED
+    # only apply the answer if the location was not edited again in the meantime
+    updated = Job.objects.filter(pk=job_id, location=location).update(
+        latitude=lat, longitude=lng, geohash=job_geohash(lat, lng), geocode_status=status
+    )
+    if updated:
+        # .update() sends no signals; refresh the distance arrays, clusters and snapshots directly
+        distance.invalidate()
+        map_clusters.move_job((old_lat, old_lng, category), (lat, lng, category))
+        map_snapshots.mark_stale()
+
+def _run():
+    while True:
+        job_id = _queue.get()
+        try:
+            close_old_connections()
+            geocode_job(job_id)
+        except Exception:
+            logger.exception("Background geocoding failed for job %s", job_id)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="job-geocoder", daemon=True)
+            _worker.start()
+
+def enqueue_job_geocode(job_id):
+    """Geocode the job once the current transaction commits."""
+    if getattr(settings, "GEOCODE_ASYNC", True):
+        def submit():
+            _ensure_worker()
+            _queue.put(job_id)
+    else:
+        def submit():
+            geocode_job(job_id)
+    transaction.on_commit(submit)
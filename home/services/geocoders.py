@@ -0,0 +1,144 @@
+"""
+Geocoder backends used by home/services/geocoding.py.
+
+A backend is any class with ``lookup(address) -> (status, lat, lng)`` where status is
+a GeocodeCacheEntry.Status. The active one is chosen with settings.GEOCODER_BACKEND
+(dotted path) and settings.GEOCODER_OPTIONS (constructor keyword arguments):
+
+- GoogleGeocoder: the Google Geocoding HTTP API (default).
+- GazetteerGeocoder: offline lookups against the bundled city list in home/data.
+- FixtureGeocoder: replays recorded answers from a JSON file; with ``record_with``
+  it forwards misses to another backend and appends the answers to the file.
+"""
+import csv
+import functools
+import json
+import threading
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from home.models import GeocodeCacheEntry
+
+Status = GeocodeCacheEntry.Status
+
+DEFAULT_BACKEND = "home.services.geocoders.GoogleGeocoder"
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"
+
+
+def _key(address):
+    # imported lazily: geocoding imports this module to build the backend
+    from home.services.geocoding import normalize_address
+    return normalize_address(address)
+
+
+class GoogleGeocoder:
+    url = "https://maps.googleapis.com/maps/api/geocode/json"
+
+    def __init__(self, api_key=None, timeout=5):
+        self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        self.timeout = timeout
+
+    def lookup(self, address):
+        params = {"address": address, "key": self.api_key}
+        try:
+            data = requests.get(self.url, params=params, timeout=self.timeout).json()
+        except (requests.RequestException, ValueError):
+            return Status.ERROR, None, None
+
+        if data.get("status") == "OK":
+            loc = data["results"][0]["geometry"]["location"]
+            return Status.OK, float(loc["lat"]), float(loc["lng"])
+        if data.get("status") == "ZERO_RESULTS":
+            return Status.NOT_FOUND, None, None
+        return Status.ERROR, None, None
+
+
+class GazetteerGeocoder:
+    """Resolves "City, ST" style addresses from a bundled CSV without any network."""
+
+    COUNTRY_SUFFIXES = (", usa", ", us", ", united states")
+
+    def __init__(self, path=None):
+        self.places = {}
+        with open(path or GAZETTEER_PATH, newline="") as fh:
+            for row in csv.DictReader(fh):
+                self.places[_key(row["name"])] = (float(row["latitude"]), float(row["longitude"]))
+
+    def coordinates(self, address):
+        key = _key(address)
+        for suffix in self.COUNTRY_SUFFIXES:
+            if key.endswith(suffix):
+                key = key[: -len(suffix)]
+                break
+        if key in self.places:
+            return self.places[key]
+        # "123 Main St, Austin, TX" -> "austin, tx"
+        parts = [p.strip() for p in key.split(",")]
+        if len(parts) > 2:
+            return self.places.get(", ".join(parts[-2:]))
+        return None
+
+    def lookup(self, address):
+        coords = self.coordinates(address)
+        if coords is None:
+            return Status.NOT_FOUND, None, None
+        return Status.OK, coords[0], coords[1]
+
+
+@functools.lru_cache(maxsize=1)
+def bundled_gazetteer():
+    """Shared GazetteerGeocoder over the bundled city list."""
+    return GazetteerGeocoder()
+
+
+class FixtureGeocoder:
+    """Replays answers from a JSON fixture: {"normalized address": [status, lat, lng]}."""
+
+    def __init__(self, path, record_with=None, record_options=None):
+        self.path = Path(path)
+        self.recorder = import_string(record_with)(**(record_options or {})) if record_with else None
+        self._lock = threading.Lock()
+        self.answers = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def lookup(self, address):
+        key = _key(address)
+        answer = self.answers.get(key)
+        if answer is not None:
+            status, lat, lng = answer
+            return Status(status), lat, lng
+        if self.recorder is None:
+            return Status.NOT_FOUND, None, None
+
+        status, lat, lng = self.recorder.lookup(address)
+        if status != Status.ERROR:
+            with self._lock:
+                self.answers[key] = [str(status), lat, lng]
+                self.path.write_text(json.dumps(self.answers, indent=2, sort_keys=True))
+        return status, lat, lng
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_geocoder():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_class = import_string(getattr(settings, "GEOCODER_BACKEND", DEFAULT_BACKEND))
+            _backend = backend_class(**getattr(settings, "GEOCODER_OPTIONS", {}))
+        return _backend
+
+def reset_geocoder():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+@receiver(setting_changed)
+def _reset_on_settings_change(setting, **kwargs):
+    if setting in ("GEOCODER_BACKEND", "GEOCODER_OPTIONS"):
+        reset_geocoder()
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from home.models import GeocodeCacheEntry
+from home.services.geocoders import get_geocoder
+
+# Single entry point for turning a free-text address into coordinates. Lookups go
+# through an in-process LRU, then the GeocodeCacheEntry table, and only then the
+# configured backend (home/services/geocoders.py). Failures are cached as well so a
+# bad address is not retried on every request; transient provider errors expire
+# quickly, "not found" answers more slowly.
+SUCCESS_TTL = timedelta(days=90)
+NOT_FOUND_TTL = timedelta(days=1)
+ERROR_TTL = timedelta(minutes=5)
+TTL_BY_STATUS = {
+    GeocodeCacheEntry.Status.OK: SUCCESS_TTL,
+    GeocodeCacheEntry.Status.NOT_FOUND: NOT_FOUND_TTL,
+    GeocodeCacheEntry.Status.ERROR: ERROR_TTL,
+}
+LRU_SIZE = 2048
+
+
+def normalize_address(address) -> str:
+    return " ".join((address or "").replace(",", ", ").split()).strip(" ,.").lower()[:255]
+
+
+class _LRU:
+    """Small thread-safe LRU whose entries also carry an absolute expiry time."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: timedelta):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl.total_seconds())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory = _LRU(LRU_SIZE)
+
+
+def remember(address, status, lat, lng):
+    """Store a backend answer in both cache layers."""
+    key = normalize_address(address)
+    ttl = TTL_BY_STATUS[status]
+    GeocodeCacheEntry.objects.update_or_create(
+        address_key=key,
+        defaults={
+            "address": address[:255],
+            "status": status,
+            "latitude": lat,
+            "longitude": lng,
+            "expires_at": timezone.now() + ttl,
+        },
+    )
+    _memory.set(key, (lat, lng), ttl)
+
+
+def lookup_uncached(address):
+    """Ask the configured backend directly; returns (status, lat, lng)."""
+    return get_geocoder().lookup(address)
+
+
+def _cached_rows(addresses, status, fields):
+    keys = sorted({normalize_address(a) for a in addresses} - {""})
+    now = timezone.now()
+    for start in range(0, len(keys), 500):
+        yield from GeocodeCacheEntry.objects.filter(
+            address_key__in=keys[start:start + 500],
+            status=status,
+            expires_at__gt=now,
+        ).values_list("address_key", *fields)
+
+
+def cached_coordinates(addresses):
+    """Unexpired successful answers from the cache table: {normalized key: (lat, lng)}."""
+    rows = _cached_rows(addresses, GeocodeCacheEntry.Status.OK, ("latitude", "longitude"))
+    return {key: (lat, lng) for key, lat, lng in rows}
+
+
+def cached_not_found(addresses):
+    """Normalized keys with an unexpired "not found" answer; not worth asking again yet."""
+    return {key for (key,) in _cached_rows(addresses, GeocodeCacheEntry.Status.NOT_FOUND, ())}
+
+
+def geocode(address):
+    """Return (lat, lng) for an address, or (None, None) if it cannot be resolved."""
+    key = normalize_address(address)
+    if not key:
+        return None, None
+
+    cached = _memory.get(key)
+    if cached is not None:
+        return cached
+
+    entry = GeocodeCacheEntry.objects.filter(address_key=key, expires_at__gt=timezone.now()).first()
+    if entry is not None:
+        remaining = entry.expires_at - timezone.now()
+        _memory.set(key, (entry.latitude, entry.longitude), remaining)
+        return entry.latitude, entry.longitude
+
+    status, lat, lng = lookup_uncached(address)
+    remember(address, status, lat, lng)
+    return lat, lng
+
+
+def clear_memory_cache():
+    _memory.clear()
@@ -0,0 +1,150 @@
+import math
+from collections import Counter
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from home.models import Job, JobMapCell
+
+# Server-side clustering for the job map. Each geocoded job is counted in one grid
+# cell per zoom level (CELL_PIXELS wide on the Web Mercator tile grid), split by
+# category. A viewport request reads only the cells it covers at its zoom, so the
+# payload depends on the screen size rather than on how many jobs exist; above
+# MAX_CLUSTER_ZOOM individual jobs are returned instead.
+MAX_CLUSTER_ZOOM = 12
+CELL_PIXELS = 64
+MAX_MERCATOR_LAT = 85.05112878
+MAX_VIEWPORT_JOBS = 500
+
+
+def cells_per_axis(zoom):
+    return (256 // CELL_PIXELS) << zoom
+
+def cell_for(lat, lng, zoom):
+    n = cells_per_axis(zoom)
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    phi = math.radians(lat)
+    y = int((1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def job_cells(latitude, longitude, category):
+    """(zoom, x, y, category) keys a job at these coordinates is counted in."""
+    if latitude is None or longitude is None:
+        return []
+    category = (category or "").strip()[:255]
+    return [(zoom, *cell_for(latitude, longitude, zoom), category) for zoom in range(MAX_CLUSTER_ZOOM + 1)]
+
+def _shift(latitude, longitude, delta):
+    # count is clamped at zero: writes that bypass the signals can leave a cell behind,
+    # and a later delete must not trip the count >= 0 check
+    return {
+        "count": Greatest(F("count") + delta, 0),
+        "lat_sum": F("lat_sum") + latitude * delta,
+        "lng_sum": F("lng_sum") + longitude * delta,
+    }
+
+def apply_cell_delta(keys, latitude, longitude, delta: int):
+    for zoom, x, y, category in keys:
+        cell = JobMapCell.objects.filter(zoom=zoom, x=x, y=y, category=category)
+        updated = cell.update(**_shift(latitude, longitude, delta))
+        if not updated and delta > 0:
+            _, created = JobMapCell.objects.get_or_create(
+                zoom=zoom, x=x, y=y, category=category,
+                defaults={"count": delta, "lat_sum": latitude * delta, "lng_sum": longitude * delta},
+            )
+            if not created:
+                cell.update(**_shift(latitude, longitude, delta))
+        elif updated and delta < 0:
+            # emptied cells are pruned so their coordinate sums cannot carry drift forward
+            cell.filter(count=0).delete()
+
+def move_job(previous, current):
+    """Move a job between cells; previous/current are (latitude, longitude, category) or None."""
+    if previous == current:
+        return
+    if previous is not None and previous[0] is not None and previous[1] is not None:
+        apply_cell_delta(job_cells(*previous), previous[0], previous[1], -1)
+    if current is not None and current[0] is not None and current[1] is not None:
+        apply_cell_delta(job_cells(*current), current[0], current[1], +1)
+
+def rebuild_map_clusters() -> int:
+    """Recompute the whole table from Job; used to seed or repair it."""
+    counts, lat_sums, lng_sums = Counter(), Counter(), Counter()
+    rows = Job.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+        "latitude", "longitude", "category"
+    )
+    for lat, lng, category in rows.iterator():
+        for key in job_cells(lat, lng, category):
+            counts[key] += 1
+            lat_sums[key] += lat
+            lng_sums[key] += lng
+    JobMapCell.objects.all().delete()
+    JobMapCell.objects.bulk_create(
+        [
+            JobMapCell(
+                zoom=zoom, x=x, y=y, category=category,
+                count=n, lat_sum=lat_sums[zoom, x, y, category], lng_sum=lng_sums[zoom, x, y, category],
+            )
+            for (zoom, x, y, category), n in counts.items()
+        ],
+        batch_size=1000,
+    )
+    return len(counts)
+
+
+def _x_ranges(west, east, zoom):
+    n = cells_per_axis(zoom)
+    if east - west >= 360:
+        return [(0, n - 1)]
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    x_west, _ = cell_for(0, west, zoom)
+    x_east, _ = cell_for(0, east, zoom)
+    if x_west <= x_east and west <= east:
+        return [(x_west, x_east)]
+    # viewport crosses the antimeridian
+    return [(x_west, n - 1), (0, x_east)]
+
+def viewport_clusters(south, west, north, east, zoom):
+    """Clusters in the viewport: [{lat, lng, count, categories}] ordered by size."""
+    zoom = max(0, min(int(zoom), MAX_CLUSTER_ZOOM))
+    _, y_top = cell_for(north, 0, zoom)
+    _, y_bottom = cell_for(south, 0, zoom)
+    x_q = Q()
+    for lo, hi in _x_ranges(west, east, zoom):
+        x_q |= Q(x__gte=lo, x__lte=hi)
+    rows = (
+        JobMapCell.objects
+        .filter(x_q, zoom=zoom, y__gte=y_top, y__lte=y_bottom, count__gt=0)
+        .values_list("x", "y", "category", "count", "lat_sum", "lng_sum")
+    )
+    clusters = {}
+    for x, y, category, count, lat_sum, lng_sum in rows:
+        cluster = clusters.setdefault((x, y), {"count": 0, "lat_sum": 0.0, "lng_sum": 0.0, "categories": {}})
+        cluster["count"] += count
+        cluster["lat_sum"] += lat_sum
+        cluster["lng_sum"] += lng_sum
+        cluster["categories"][category or "Other"] = cluster["categories"].get(category or "Other", 0) + count
+    result = [
+        {
+            "lat": round(c["lat_sum"] / c["count"], 5),
+            "lng": round(c["lng_sum"] / c["count"], 5),
+            "count": c["count"],
+            "categories": c["categories"],
+        }
+        for c in clusters.values()
+    ]
+    result.sort(key=lambda c: -c["count"])
+    return result
+
+def viewport_jobs(south, west, north, east, limit=MAX_VIEWPORT_JOBS):
+    """Individual geocoded jobs inside the viewport, for zoom levels above the clusters."""
+    lng_q = Q(longitude__gte=west, longitude__lte=east) if west <= east else (
+        Q(longitude__gte=west) | Q(longitude__lte=east)
+    )
+    return (
+        Job.objects
+        .filter(lng_q, latitude__gte=south, latitude__lte=north)
+        .order_by("-date")
+        .values("id", "title", "location", "latitude", "longitude", "salary", "category", "date")[:limit]
+    )
@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import close_old_connections, transaction
+from django.utils.text import slugify
+
+from home.models import Job
+from home.services import versions
+
+# Precomputed GeoJSON for the public job map. Every geocoded job goes into one full
+# FeatureCollection plus one per category, each written gzip-compressed to the
+# "map_snapshots" storage under a content-hash name (jobs.<hash>.geojson.gz), so a
+# URL never changes meaning and can be cached indefinitely. manifest.json maps the
+# variants to their current URLs and records the shared "map_snapshots" version it
+# was built from. Job signals bump that version (visible to every worker process)
+# and queue a debounced rebuild on a background thread; `build_map_snapshots` does
+# the same from cron or a deploy hook. Requests never build: until the rebuild
+# lands they get the previous manifest, flagged stale.
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+VERSION_NAME = "map_snapshots"
+REBUILD_DELAY_SECONDS = 5  # coalesces a burst of job edits into one rebuild
+SNAPSHOT_NAME_RE = re.compile(r"^jobs(-[a-z0-9_-]+)?\.[0-9a-f]{16}\.geojson\.gz$")
+
+_build_lock = threading.Lock()
+_rebuild_timer = None
+_timer_lock = threading.Lock()
+
+
+def get_storage():
+    return storages["map_snapshots"]
+
+def job_feature(job):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [job["longitude"], job["latitude"]]},
+        "properties": {
+            "id": job["id"],
+            "title": job["title"],
+            "location": job["location"],
+            "category": job["category"],
+            "salary": str(job["salary"]),
+            "date": job["date"].strftime("%b %d, %Y"),
+        },
+    }
+
+def _encode(features):
+    payload = json.dumps(
+        {"type": "FeatureCollection", "features": features}, separators=(",", ":"), sort_keys=True
+    ).encode()
+    # mtime=0 keeps identical content byte-identical, and so under the same name
+    return gzip.compress(payload, mtime=0)
+
+def _write(storage, prefix, features):
+    data = _encode(features)
+    name = f"{prefix}.{hashlib.sha256(data).hexdigest()[:16]}.geojson.gz"
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            # a concurrent build wrote the same content first; keep its copy
+            storage.delete(saved)
+    return name
+
+def _read_manifest(storage):
+    if not storage.exists(MANIFEST_NAME):
+        return None
+    with storage.open(MANIFEST_NAME) as fh:
+        return json.loads(fh.read())
+
+def _publish_manifest(storage, manifest):
+    data = json.dumps(manifest, sort_keys=True).encode()
+    try:
+        target = storage.path(MANIFEST_NAME)
+    except NotImplementedError:
+        # remote storages: no atomic rename, overwrite in place
+        storage.delete(MANIFEST_NAME)
+        storage.save(MANIFEST_NAME, ContentFile(data))
+        return
+    # write beside the target and rename over it, so readers never see a partial file
+    # and concurrent builds never make the storage pick an alternate name
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".manifest-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def build_snapshots():
+    """Write the full and per-category snapshots and the manifest; returns the manifest."""
+    storage = get_storage()
+    # read first: a change landing mid-build leaves the result behind the version
+    version = versions.current(VERSION_NAME)
+
+    rows = (
+        Job.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .order_by("id")
+        .values("id", "title", "location", "category", "salary", "date", "latitude", "longitude")
+    )
+    features, by_category = [], {}
+    for job in rows.iterator():
+        feature = job_feature(job)
+        features.append(feature)
+        by_category.setdefault((job["category"] or "").strip(), []).append(feature)
+
+    manifest = {
+        "version": version,
+        "all": {"name": _write(storage, "jobs", features), "count": len(features)},
+        "categories": {},
+    }
+    slugs = set()
+    for category in sorted(by_category):
+        slug = slugify(category) or "uncategorized"
+        while slug in slugs:
+            slug += "-x"
+        slugs.add(slug)
+        manifest["categories"][category or "Uncategorized"] = {
+            "name": _write(storage, f"jobs-{slug}", by_category[category]),
+            "count": len(by_category[category]),
+        }
+
+    with _build_lock:
+        previous = _read_manifest(storage)
+        if previous and previous.get("version", -1) > version:
+            return previous  # a newer build finished first
+        _publish_manifest(storage, manifest)
+        _prune(storage, [manifest, previous])
+    return manifest
+
+def _prune(storage, manifests):
+    # keep the files of the current and previous manifest so clients mid-fetch still succeed
+    keep = set()
+    for manifest in manifests:
+        if manifest:
+            keep.add(manifest["all"]["name"])
+            keep.update(v["name"] for v in manifest["categories"].values())
+    try:
+        _, files = storage.listdir("")
+    except FileNotFoundError:
+        return
+    for name in files:
+        if SNAPSHOT_NAME_RE.match(name) and name not in keep:
+            storage.delete(name)
+
+def _rebuild_in_background():
+    global _rebuild_timer
+    behind = False
+    try:
+        close_old_connections()
+        manifest = build_snapshots()
+        behind = manifest.get("version", -1) < versions.current(VERSION_NAME)
+    except Exception:
+        logger.exception("Map snapshot rebuild failed")
+    finally:
+        close_old_connections()
+        with _timer_lock:
+            _rebuild_timer = None
+    if behind:
+        # jobs changed while building; their schedule_rebuild() calls were absorbed by this run
+        schedule_rebuild()
+
+def schedule_rebuild():
+    """Rebuild on a background thread shortly after now, unless one is already pending."""
+    global _rebuild_timer
+    if not getattr(settings, "MAP_SNAPSHOT_ASYNC", True):
+        return  # left to `build_map_snapshots`
+    with _timer_lock:
+        if _rebuild_timer is None:
+            _rebuild_timer = threading.Timer(REBUILD_DELAY_SECONDS, _rebuild_in_background)
+            _rebuild_timer.daemon = True
+            _rebuild_timer.start()
+
+def mark_stale():
+    versions.bump(VERSION_NAME)
+    transaction.on_commit(schedule_rebuild)
+
+def current_manifest():
+    """The last published manifest with public URLs; never builds on the request path."""
+    storage = get_storage()
+    manifest = _read_manifest(storage)
+    stale = manifest is None or manifest.get("version", -1) < versions.current(VERSION_NAME)
+    if stale:
+        schedule_rebuild()
+    if manifest is None:
+        return {"stale": True, "all": None, "categories": {}}
+    return {
+        "stale": stale,
+        "all": {"url": storage.url(manifest["all"]["name"]), "count": manifest["all"]["count"]},
+        "categories": {
+            category: {"url": storage.url(v["name"]), "count": v["count"]}
+            for category, v in manifest["categories"].items()
+        },
+    }
+
+def open_snapshot(name):
+    """Open a snapshot file by name, or None if the name is not a snapshot that exists."""
+    storage = get_storage()
+    if not SNAPSHOT_NAME_RE.match(name) or not storage.exists(name):
+        return None
+    return storage.open(name)
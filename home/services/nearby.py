@@ -0,0 +1,58 @@
+import math
+
+from home.models import Job
+from home.services.distance import distances_from
+from home.services.geo import EARTH_RADIUS_MILES, geohash_cell_size, geohash_prefix_q, geohash_ring
+
+# k-nearest jobs from the indexed Job.geohash column. Starting at a fine precision,
+# rings of cells around the origin are scanned as index ranges until the k-th best
+# exact distance is closer than anything outside the searched square could be; if
+# the rings run out first the search restarts one precision coarser. Work depends
+# on how many jobs sit near the origin, not on the size of the table; when fewer
+# than k jobs match within the coarsest rings, fewer than k are returned.
+PRECISIONS = (6, 5, 4, 3, 2, 1)
+RINGS_PER_PRECISION = 2
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+NEARBY_FIELDS = ("id", "title", "location", "category", "salary", "latitude", "longitude")
+
+
+def _covered_radius(lat, precision, ring):
+    """Miles from any point of the origin cell that `ring` rings are guaranteed to cover."""
+    if ring == 0:
+        return 0.0
+    height, width = geohash_cell_size(precision)
+    worst_lat = min(89.999, abs(lat) + (ring + 1) * height)
+    return ring * MILES_PER_DEGREE * min(height, width * math.cos(math.radians(worst_lat)))
+
+def nearest_jobs(lat, lng, k=10, category=None, min_salary=None, max_salary=None):
+    """The k jobs closest to (lat, lng) as value dicts with a "distance_miles" key, nearest first."""
+    jobs = Job.objects.exclude(geohash="")
+    if category:
+        jobs = jobs.filter(category__iexact=category)
+    if min_salary is not None:
+        jobs = jobs.filter(salary__gte=min_salary)
+    if max_salary is not None:
+        jobs = jobs.filter(salary__lte=max_salary)
+
+    found = {}
+    for precision in PRECISIONS:
+        searched = set()
+        for ring in range(RINGS_PER_PRECISION + 1):
+            cells = geohash_ring(lat, lng, precision, ring) - searched
+            searched |= cells
+            rows = [row for row in jobs.filter(geohash_prefix_q(cells)).values(*NEARBY_FIELDS)
+                    if row["id"] not in found]
+            miles = distances_from(lat, lng, [r["latitude"] for r in rows], [r["longitude"] for r in rows])
+            for row, m in zip(rows, miles):
+                row["distance_miles"] = round(float(m), 2)
+                found[row["id"]] = row
+            if len(found) >= k:
+                kth = sorted(r["distance_miles"] for r in found.values())[k - 1]
+                if kth <= _covered_radius(lat, precision, ring):
+                    return _ranked(found, k)
+    # fewer than k matches even in the coarsest rings, which already span most of the
+    # globe: return what was found rather than scanning the rest of the table
+    return _ranked(found, k)
+
+def _ranked(found, k):
+    return sorted(found.values(), key=lambda r: (r["distance_miles"], r["id"]))[:k]
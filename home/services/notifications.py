@@ -0,0 +1,67 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from home.models import SavedCandidateMatch, SavedSearchUnreadCounter
+from jobplatform.events import publish_to_user
+
+# Unread saved-search match counts per recruiter. The SavedSearchUnreadCounter row is
+# the value, recounted from SavedCandidateMatch whenever matches are inserted, marked
+# seen or deleted (writes are rare, badge polls are not). The poll reads that one
+# indexed row rather than a per-process cache, so every worker reports the same count.
+# Changes are also pushed to open pages over the events stream (jobplatform/sse.py).
+_scheduled = threading.local()
+
+def unread_count(owner_id) -> int:
+    return (
+        SavedSearchUnreadCounter.objects.filter(owner_id=owner_id)
+        .values_list("unread", flat=True)
+        .first()
+    ) or 0
+
+def _unseen_count(owner_id):
+    return (
+        SavedCandidateMatch.objects.filter(search__owner_id=owner_id, seen=False)
+        .values("search__owner_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+
+def recompute_unread(owner_id) -> int:
+    """
+    Set the counter from SavedCandidateMatch in one UPDATE ... SELECT COUNT, so the
+    value reflects every committed insert, delete and mark-seen at the time of the
+    write rather than a delta computed earlier.
+    """
+    updated = SavedSearchUnreadCounter.objects.filter(owner_id=owner_id).update(
+        unread=Coalesce(Subquery(_unseen_count(owner_id)), 0), updated_at=timezone.now()
+    )
+    if not updated and User.objects.filter(pk=owner_id).exists():
+        SavedSearchUnreadCounter.objects.get_or_create(owner_id=owner_id)
+        return recompute_unread(owner_id)
+    unread = unread_count(owner_id)
+    publish_to_user(owner_id, "saved_search_unread", {"count": unread})
+    return unread
+
+def clear_unread(owner_id):
+    # Called after the matches were marked seen; matches inserted concurrently stay counted
+    return recompute_unread(owner_id)
+
+def schedule_recompute(owner_id):
+    """Recompute once when the current transaction commits (e.g. after a cascade delete)."""
+    pending = getattr(_scheduled, "owners", None)
+    if pending is None:
+        pending = _scheduled.owners = set()
+    if owner_id in pending:
+        return
+    pending.add(owner_id)
+
+    def run():
+        pending.discard(owner_id)
+        recompute_unread(owner_id)
+
+    transaction.on_commit(run)
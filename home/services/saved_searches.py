@@ -1,8 +1,9 @@
-from django.db.models import Q
+from django.db.models import F, Q
 from django.utils import timezone
 from accounts.models import Profile
 from django.contrib.auth.models import User
 from home.models import SavedCandidateSearch, SavedCandidateMatch
+from home.services.notifications import recompute_unread
 
 def _profile_queryset_for_search(s: SavedCandidateSearch):
     base = Profile.objects.select_related("user").filter(
@@ -25,19 +26,81 @@ def _profile_queryset_for_search(s: SavedCandidateSearch):
         q &= Q(location__icontains=s.location)
 
     if s.min_years_experience:
-        q &= Q(experience__icontains=f"{s.min_years_experience}+")
+        q &= Q(years_experience__gte=s.min_years_experience)
 
     return base.filter(q)
 
-def run_search_and_record_new_matches(s: SavedCandidateSearch) -> int:
-    qs = _profile_queryset_for_search(s)
-    count_new = 0
-    for prof in qs:
-        if prof.user_id == s.owner_id:
-            continue
-        obj, created = SavedCandidateMatch.objects.get_or_create(search=s, candidate=prof.user)
-        if created:
-            count_new += 1
-    s.last_run_at = timezone.now()
+MATCH_INSERT_BATCH_SIZE = 1000
+
+def record_new_matches(s: SavedCandidateSearch, since=None) -> list[int]:
+    """Insert matches for candidates not yet matched by ``s``; return their user ids.
+
+    When ``since`` is given only profiles edited at or after that time are scanned,
+    which is what the scheduled runner uses to make repeat runs incremental.
+    """
+    started_at = timezone.now()
+    profiles = _profile_queryset_for_search(s).exclude(user_id=s.owner_id)
+    if since is not None:
+        profiles = profiles.filter(updated_at__gte=since)
+
+    # Set difference against the matches we already have, computed in two queries
+    # instead of a get_or_create round trip per profile.
+    candidate_ids = set(profiles.values_list("user_id", flat=True))
+    existing_ids = set(
+        SavedCandidateMatch.objects.filter(search=s).values_list("candidate_id", flat=True)
+    )
+    new_ids = sorted(candidate_ids - existing_ids)
+
+    for start in range(0, len(new_ids), MATCH_INSERT_BATCH_SIZE):
+        chunk = new_ids[start:start + MATCH_INSERT_BATCH_SIZE]
+        # ignore_conflicts covers a concurrent run inserting the same rows; the
+        # pre-computed difference is what we report as new.
+        SavedCandidateMatch.objects.bulk_create(
+            [SavedCandidateMatch(search=s, candidate_id=uid) for uid in chunk],
+            ignore_conflicts=True,
+        )
+
+    if new_ids:
+        # recount rather than add len(new_ids): rows skipped as conflicts are not new
+        recompute_unread(s.owner_id)
+
+    # Stamp the start of the run so profiles edited while it ran are picked up next time.
+    s.last_run_at = started_at
     s.save(update_fields=["last_run_at"])
-    return count_new
+    return new_ids
+
+def record_profile_matches(profile: Profile) -> int:
+    """Match one saved profile against the active searches; return how many it newly matched.
+
+    Only that profile is checked, and last_run_at is left alone: it is the
+    scheduled runner's incremental window, which will also see this edit.
+    """
+    searches = (
+        SavedCandidateSearch.objects.filter(is_active=True)
+        .exclude(owner_id=profile.user_id)
+        .exclude(matches__candidate_id=profile.user_id)
+    )
+    matched = [s for s in searches if _profile_queryset_for_search(s).filter(pk=profile.pk).exists()]
+    SavedCandidateMatch.objects.bulk_create(
+        [SavedCandidateMatch(search=s, candidate_id=profile.user_id) for s in matched],
+        ignore_conflicts=True,
+    )
+    for owner_id in {s.owner_id for s in matched}:
+        recompute_unread(owner_id)
+    return len(matched)
+
+def run_search_and_record_new_matches(s: SavedCandidateSearch, since=None) -> int:
+    return len(record_new_matches(s, since=since))
+
+def pending_digest_matches(search_ids):
+    """Unseen matches of the given searches that have not been included in a digest yet."""
+    return (
+        SavedCandidateMatch.objects
+        .filter(search_id__in=search_ids, seen=False)
+        .filter(
+            Q(search__last_notified_at__isnull=True) |
+            Q(matched_at__gt=F("search__last_notified_at"))
+        )
+        .select_related("search", "search__owner", "candidate", "candidate__profile")
+        .order_by("search__owner_id", "search_id", "-matched_at")
+    )
@@ -0,0 +1,91 @@
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import caches
+
+from home.services import versions
+
+# Cache of ordered job-id pages for home.views.index, keyed by the normalized search.
+# Every key embeds a generation number that Job save/delete bumps (home/signals.py).
+# The generation is a shared DB counter, so a write in any worker process makes all
+# older entries unreachable everywhere and LRU/TTL eviction reclaims them.
+SEARCH_CACHE_ALIAS = "search"
+GENERATION_NAME = "jobsearch"
+HITS_KEY = "jobsearch:hits"
+MISSES_KEY = "jobsearch:misses"
+SEARCH_TYPES = {"title", "location", "category"}
+
+def _cache():
+    return caches[SEARCH_CACHE_ALIAS]
+
+def parse_salary(value):
+    """Salary filter as a Decimal, None when absent; raises ValueError when malformed."""
+    if value is None or not str(value).strip():
+        return None
+    try:
+        salary = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid salary: {value!r}")
+    if not salary.is_finite():
+        raise ValueError(f"invalid salary: {value!r}")
+    return salary
+
+def _normalize_salary(value):
+    salary = parse_salary(value)
+    return str(salary.normalize()) if salary is not None else ""
+
+def normalize_search(search_term, search_type, min_salary, max_salary, page, facets=None):
+    term = " ".join((search_term or "").split()).lower()
+    return {
+        "q": term,
+        # search_type only matters when there is a term to match
+        "type": (search_type if search_type in SEARCH_TYPES else "title") if term else "",
+        "min": _normalize_salary(min_salary),
+        "max": _normalize_salary(max_salary),
+        "page": page,
+        "facets": sorted((k, v) for k, v in (facets or {}).items() if v),
+    }
+
+def current_generation() -> int:
+    return versions.current(GENERATION_NAME)
+
+def bump_generation():
+    versions.bump(GENERATION_NAME)
+
+def _key(normalized) -> str:
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"jobsearch:{current_generation()}:{digest}"
+
+def _count(stat_key):
+    cache = _cache()
+    try:
+        cache.incr(stat_key)
+    except ValueError:
+        cache.add(stat_key, 0, timeout=None)
+        cache.incr(stat_key)
+
+def get_or_compute(normalized, compute):
+    """Return the cached ``{"ids": [...], "count": n}`` page or compute and store it."""
+    cache = _cache()
+    key = _key(normalized)
+    result = cache.get(key)
+    if result is not None:
+        _count(HITS_KEY)
+        return result
+    _count(MISSES_KEY)
+    result = compute()
+    cache.set(key, result)
+    return result
+
+def stats():
+    cache = _cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+        "generation": current_generation(),
+    }
@@ -0,0 +1,281 @@
+import heapq
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+
+from accounts.models import Profile
+from home.models import Job
+
+# In-process prefix index behind the typeahead endpoint. Each field keeps a sorted
+# array of "<suffix>\0<value key>" entries, one per word position of every distinct
+# value, so both "py" and "dev" find "Python Developer" with a single bisect.
+# Prefixes of up to SHORT_PREFIX_LENGTH characters match most of the corpus, so their
+# best TOP_SIZE values are kept ranked and maintained on every change; longer prefixes
+# rank at most SCAN_LIMIT entries of their bisect range. Job/Profile signals feed
+# row-level diffs through update_source().
+FIELDS = ("title", "location", "category", "skill", "candidate_location")
+MAX_AGE_SECONDS = 600  # rebuild so writes made by other worker processes show up
+SHORT_PREFIX_LENGTH = 2
+TOP_SIZE = 20  # the most suggestions the endpoint asks for
+SCAN_LIMIT = 2000
+_PREFIX_END = "\U0010ffff"
+
+_SEPARATORS = re.compile(r"[,;\n]+")
+
+
+def _value_key(value):
+    return " ".join(value.split()).lower()
+
+def _rank(slot):
+    return -slot[1], slot[0].lower()
+
+def _short_prefixes(key):
+    words = key.split(" ")
+    return {
+        " ".join(words[i:])[:n]
+        for i in range(len(words))
+        for n in range(1, SHORT_PREFIX_LENGTH + 1)
+    }
+
+def split_skills(text):
+    if not text:
+        return []
+    parts = [p.strip() for p in _SEPARATORS.split(text) if p.strip()]
+    if len(parts) == 1:
+        # space separated lists such as "python django react"
+        parts = parts[0].split()
+    return parts
+
+def job_values(job):
+    values = set()
+    for field in ("title", "location", "category"):
+        value = (getattr(job, field) or "").strip()
+        if value:
+            values.add((field, value))
+    return values
+
+def profile_values(profile):
+    values = set()
+    if profile.is_recruiter or profile.visibility == Profile.Visibility.PRIVATE:
+        return values
+    if profile.show_skills_to_recruiters:
+        values.update(("skill", s) for s in split_skills(profile.skills))
+    if profile.show_location_to_recruiters and (profile.location or "").strip():
+        values.add(("candidate_location", profile.location.strip()))
+    return values
+
+
+class _FieldIndex:
+    # Writers hold the module lock; search() runs without it, so it reads each list
+    # once and tolerates values disappearing under it. Top lists are replaced, never
+    # mutated in place.
+    def __init__(self):
+        self.entries = []   # sorted "<suffix>\0<value key>"
+        self.values = {}    # value key -> [display value, reference count]
+        self.top = {}       # short prefix -> value keys of its best TOP_SIZE matches, best first
+
+    def load(self, values):
+        """Bulk-load an iterable of values, sorting once instead of per insert."""
+        for value in values:
+            key = _value_key(value)
+            if not key:
+                continue
+            slot = self.values.setdefault(key, [value, 0])
+            slot[1] += 1
+        self.entries = sorted(
+            " ".join(words[i:]) + "\0" + key
+            for key, words in ((key, key.split(" ")) for key in self.values)
+            for i in range(len(words))
+        )
+        groups = {}
+        for key in self.values:
+            for prefix in _short_prefixes(key):
+                groups.setdefault(prefix, []).append(key)
+        self.top = {
+            prefix: heapq.nsmallest(TOP_SIZE, keys, key=lambda key: _rank(self.values[key]))
+            for prefix, keys in groups.items()
+        }
+
+    def add(self, value):
+        key = _value_key(value)
+        if not key:
+            return
+        slot = self.values.get(key)
+        if slot is not None:
+            slot[1] += 1
+        else:
+            self.values[key] = [value, 1]
+            words = key.split(" ")
+            for i in range(len(words)):
+                insort(self.entries, " ".join(words[i:]) + "\0" + key)
+        self._rerank(key, lowered=False)
+
+    def remove(self, value):
+        key = _value_key(value)
+        slot = self.values.get(key)
+        if slot is None:
+            return
+        slot[1] -= 1
+        if slot[1] <= 0:
+            del self.values[key]
+            words = key.split(" ")
+            for i in range(len(words)):
+                entry = " ".join(words[i:]) + "\0" + key
+                pos = bisect_left(self.entries, entry)
+                if pos < len(self.entries) and self.entries[pos] == entry:
+                    del self.entries[pos]
+        self._rerank(key, lowered=True)
+
+    def _rerank(self, key, lowered):
+        """Update the top lists of ``key``'s short prefixes after its count changed."""
+        for prefix in _short_prefixes(key):
+            top = self.top.get(prefix, [])
+            if lowered and key in top and len(top) == TOP_SIZE:
+                # a value outside the list may now outrank it
+                top = self._ranked_keys(prefix, TOP_SIZE)
+            else:
+                top = [k for k in top if k != key]
+                if key in self.values:
+                    top.append(key)
+                top = sorted(top, key=lambda k: _rank(self.values[k]))[:TOP_SIZE]
+            if top:
+                self.top[prefix] = top
+            else:
+                self.top.pop(prefix, None)
+
+    def _ranked_keys(self, prefix, limit, scan=None):
+        start = bisect_left(self.entries, prefix)
+        end = bisect_left(self.entries, prefix + _PREFIX_END, start)
+        if scan is not None:
+            end = min(end, start + scan)
+        ranked = {}
+        for entry in self.entries[start:end]:
+            key = entry.split("\0", 1)[1]
+            slot = self.values.get(key)
+            if slot is not None:
+                ranked[key] = _rank(slot)
+        return heapq.nsmallest(limit, ranked, key=ranked.get)
+
+    def search(self, prefix, limit):
+        prefix = _value_key(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            keys = self.top.get(prefix, [])[:limit]
+        else:
+            keys = self._ranked_keys(prefix, limit, SCAN_LIMIT)
+        results = []
+        for key in keys:
+            slot = self.values.get(key)
+            if slot is not None:
+                results.append({"value": slot[0], "count": slot[1]})
+        return results
+
+    def nbytes(self):
+        size = sys.getsizeof(self.entries) + sys.getsizeof(self.values) + sys.getsizeof(self.top)
+        size += sum(sys.getsizeof(e) for e in self.entries)
+        for key, slot in self.values.items():
+            size += sys.getsizeof(key) + sys.getsizeof(slot) + sys.getsizeof(slot[0])
+        for prefix, keys in self.top.items():
+            size += sys.getsizeof(prefix) + sys.getsizeof(keys)
+        return size
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.fields = {name: _FieldIndex() for name in FIELDS}
+        self.sources = {}   # "job:<id>" / "profile:<id>" -> set of (field, value)
+        self.built_at = time.monotonic()
+
+    def update_source(self, source, values):
+        previous = self.sources.pop(source, set())
+        for field, value in previous - values:
+            self.fields[field].remove(value)
+        for field, value in values - previous:
+            self.fields[field].add(value)
+        if values:
+            self.sources[source] = values
+
+    def search(self, field, prefix, limit=10):
+        return self.fields[field].search(prefix, limit)
+
+    def stats(self):
+        fields = {
+            name: {"values": len(f.values), "entries": len(f.entries), "bytes": f.nbytes()}
+            for name, f in self.fields.items()
+        }
+        return {
+            "fields": fields,
+            "total_bytes": sum(f["bytes"] for f in fields.values()),
+            "age_seconds": round(time.monotonic() - self.built_at, 1),
+        }
+
+
+_index = None
+_lock = threading.Lock()
+_rebuilding = False
+_pending = []  # row diffs that arrive while a replacement index is being built
+
+def build_index():
+    index = PrefixIndex()
+    for job in Job.objects.only("id", "title", "location", "category").iterator():
+        index.sources[f"job:{job.pk}"] = job_values(job)
+    profiles = Profile.objects.filter(is_recruiter=False).exclude(visibility=Profile.Visibility.PRIVATE)
+    for profile in profiles.iterator():
+        values = profile_values(profile)
+        if values:
+            index.sources[f"profile:{profile.pk}"] = values
+    for name, field in index.fields.items():
+        field.load(value for values in index.sources.values() for f, value in values if f == name)
+    return index
+
+def get_index():
+    """
+    The process-wide index. An expired index keeps serving while the one request that
+    noticed rebuilds a replacement outside the lock, then swaps it in; only a process
+    with no index at all waits for the build.
+    """
+    global _index, _rebuilding
+    with _lock:
+        index = _index
+        expired = index is None or time.monotonic() - index.built_at > MAX_AGE_SECONDS
+        if not expired or (_rebuilding and index is not None):
+            return index
+        _rebuilding = True
+    fresh = None
+    try:
+        fresh = build_index()
+    finally:
+        with _lock:
+            _rebuilding = False
+            if fresh is not None:
+                # replay row changes the build's snapshot may have missed
+                for source, values in _pending:
+                    fresh.update_source(source, values)
+                _index = fresh
+            _pending.clear()
+    return fresh
+
+def suggest(field, prefix, limit=10):
+    """Up to ``limit`` (at most TOP_SIZE) suggestions; searches without taking the lock."""
+    return get_index().search(field, prefix, min(limit, TOP_SIZE))
+
+def stats():
+    index = get_index()
+    with _lock:
+        return index.stats()
+
+def refresh_source(source, values):
+    """Apply a row change to the index if this process has built one."""
+    with _lock:
+        if _index is not None:
+            _index.update_source(source, values)
+        if _rebuilding:
+            _pending.append((source, values))
+
+def reset_index():
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,20 @@
+from django.db.models import F
+from django.utils import timezone
+
+from home.models import SharedVersion
+
+# Cross-process invalidation counters. Per-process caches (LocMem) embed current()
+# in their keys, so a bump made by any worker retires every worker's entries on
+# their next read.
+
+
+def current(name) -> int:
+    return SharedVersion.objects.filter(name=name).values_list("value", flat=True).first() or 0
+
+def bump(name) -> None:
+    now = timezone.now()
+    updated = SharedVersion.objects.filter(name=name).update(value=F("value") + 1, updated_at=now)
+    if not updated:
+        _, created = SharedVersion.objects.get_or_create(name=name, defaults={"value": 1})
+        if not created:
+            SharedVersion.objects.filter(name=name).update(value=F("value") + 1, updated_at=now)
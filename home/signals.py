@@ -1,13 +1,128 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from accounts.models import Profile
-from home.models import SavedCandidateSearch
-from home.services.saved_searches import run_search_and_record_new_matches
+from home.models import Job, SavedCandidateMatch, SavedCandidateSearch
+from home.services.facets import apply_facet_delta, facet_values
+from home.services.search_cache import bump_generation
+from home.services import distance, map_clusters, map_snapshots, typeahead
+from home.services.notifications import schedule_recompute
+from home.services.saved_searches import record_profile_matches
+
+FACET_FIELDS = {"category", "location", "salary"}
+# Fields the job index filters on; saves touching only other fields keep cached searches
+SEARCH_FIELDS = {"title", "location", "category", "salary"}
+COORDINATE_FIELDS = {"latitude", "longitude"}
+MAP_CELL_FIELDS = {"latitude", "longitude", "category"}
+# Fields written into the GeoJSON map snapshots
+SNAPSHOT_FIELDS = {"title", "location", "category", "salary", "latitude", "longitude"}
 
 @receiver(post_save, sender=Profile)
 def reindex_saved_searches_on_profile_change(sender, instance: Profile, **kwargs):
     if instance.is_recruiter:
         return
-    active = SavedCandidateSearch.objects.select_related("owner").filter(is_active=True)
-    for s in active:
-        run_search_and_record_new_matches(s)
\ No newline at end of file
+    record_profile_matches(instance)
+
+@receiver(post_delete, sender=SavedCandidateMatch)
+def recount_unread_on_match_delete(sender, instance: SavedCandidateMatch, **kwargs):
+    # covers cascades from a deleted search or candidate; one recount per owner per commit
+    owner_id = (
+        SavedCandidateSearch.objects.filter(pk=instance.search_id).values_list("owner_id", flat=True).first()
+    )
+    if owner_id is not None:
+        schedule_recompute(owner_id)
+
+@receiver(pre_save, sender=Job)
+def remember_job_facets(sender, instance: Job, update_fields=None, raw=False, **kwargs):
+    instance._facet_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not FACET_FIELDS.intersection(update_fields):
+        return
+    previous = Job.objects.filter(pk=instance.pk).values_list("category", "location", "salary").first()
+    if previous is not None:
+        instance._facet_previous = facet_values(*previous)
+
+@receiver(post_save, sender=Job)
+def update_job_facets_on_save(sender, instance: Job, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and update_fields is not None and not FACET_FIELDS.intersection(update_fields):
+        return
+    previous = getattr(instance, "_facet_previous", None) or set()
+    current = facet_values(instance.category, instance.location, instance.salary)
+    apply_facet_delta(previous - current, -1)
+    apply_facet_delta(current - previous, +1)
+
+@receiver(post_delete, sender=Job)
+def update_job_facets_on_delete(sender, instance: Job, **kwargs):
+    apply_facet_delta(facet_values(instance.category, instance.location, instance.salary), -1)
+
+@receiver(post_save, sender=Job)
+def invalidate_job_search_cache_on_save(sender, instance: Job, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    bump_generation()
+
+@receiver(post_delete, sender=Job)
+def invalidate_job_search_cache_on_delete(sender, instance: Job, **kwargs):
+    bump_generation()
+
+@receiver(post_save, sender=Job)
+def refresh_typeahead_on_job_save(sender, instance: Job, **kwargs):
+    typeahead.refresh_source(f"job:{instance.pk}", typeahead.job_values(instance))
+
+@receiver(post_delete, sender=Job)
+def refresh_typeahead_on_job_delete(sender, instance: Job, **kwargs):
+    typeahead.refresh_source(f"job:{instance.pk}", set())
+
+@receiver(post_save, sender=Profile)
+def refresh_typeahead_on_profile_save(sender, instance: Profile, **kwargs):
+    typeahead.refresh_source(f"profile:{instance.pk}", typeahead.profile_values(instance))
+
+@receiver(post_delete, sender=Profile)
+def refresh_typeahead_on_profile_delete(sender, instance: Profile, **kwargs):
+    typeahead.refresh_source(f"profile:{instance.pk}", set())
+
+@receiver(post_save, sender=Job)
+def invalidate_job_coordinates_on_save(sender, instance: Job, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not COORDINATE_FIELDS.intersection(update_fields):
+        return
+    distance.invalidate()
+
+@receiver(post_delete, sender=Job)
+def invalidate_job_coordinates_on_delete(sender, instance: Job, **kwargs):
+    distance.invalidate()
+
+@receiver(pre_save, sender=Job)
+def remember_job_map_cell(sender, instance: Job, update_fields=None, raw=False, **kwargs):
+    instance._map_cell_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not MAP_CELL_FIELDS.intersection(update_fields):
+        return
+    instance._map_cell_previous = (
+        Job.objects.filter(pk=instance.pk).values_list("latitude", "longitude", "category").first()
+    )
+
+@receiver(post_save, sender=Job)
+def update_job_map_cells_on_save(sender, instance: Job, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and update_fields is not None and not MAP_CELL_FIELDS.intersection(update_fields):
+        return
+    previous = getattr(instance, "_map_cell_previous", None)
+    map_clusters.move_job(previous, (instance.latitude, instance.longitude, instance.category))
+
+@receiver(post_delete, sender=Job)
+def update_job_map_cells_on_delete(sender, instance: Job, **kwargs):
+    map_clusters.move_job((instance.latitude, instance.longitude, instance.category), None)
+
+@receiver(post_save, sender=Job)
+def mark_map_snapshots_stale_on_save(sender, instance: Job, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not SNAPSHOT_FIELDS.intersection(update_fields):
+        return
+    map_snapshots.mark_stale()
+
+@receiver(post_delete, sender=Job)
+def mark_map_snapshots_stale_on_delete(sender, instance: Job, **kwargs):
+    map_snapshots.mark_stale()
@@ -1,8 +1,37 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from .models import Job, Application
+from accounts.models import parse_years_experience
+from home.services import distance, geocoding, search_cache, typeahead
+from home.services.geo import bounding_box_q
+from home.services.geocoders import GazetteerGeocoder
+from home.services.map_clusters import job_cells
+from home.services.map_snapshots import build_snapshots
+from home.services.saved_searches import run_search_and_record_new_matches
+from home.services.typeahead import _FieldIndex
+from jobplatform.events import publish_to_user
+from jobplatform.sse import EVENTS_PATH, event_stream
+
+from .models import (
+    Job, Application, GeocodeCacheEntry, JobFacetCount, JobMapCell, SavedCandidateMatch,
+    SavedCandidateSearch, SharedVersion,
+)
 
 
 class ApplyFlowTests(TestCase):
@@ -49,3 +78,497 @@ class ApplyFlowTests(TestCase):
         self.client.login(username="owner", password="pw")
         resp = self.client.get(reverse("home.show", args=[self.job.id]))
         self.assertContains(resp, "Applications (1)")
+
+    def test_applicant_map_groups_stored_coordinates(self):
+        self.owner.profile.is_recruiter = True
+        self.owner.profile.save()
+        self.applicant.profile.location = "Atlanta, GA"
+        self.applicant.profile.save()
+        self.client.login(username="joe", password="pw")
+        self.client.post(reverse("home.apply", args=[self.job.id]), {"note": "hi"})
+        app = Application.objects.get(applicant=self.applicant)
+        self.assertEqual((app.applicant_location, app.applicant_lat), ("Atlanta, GA", 33.7501))
+
+        # applied before locations were recorded
+        sue = User.objects.create_user(username="sue", password="pw")
+        sue.profile.location = "Atlanta, GA"
+        sue.profile.save()
+        Application.objects.create(job=self.job, applicant=sue)
+        call_command("backfill_applicant_locations", "--offline", stdout=StringIO())
+
+        self.client.login(username="owner", password="pw")
+        data = self.client.get(reverse("home.applicant_map_data")).json()
+        self.assertEqual(data, [{"location": "Atlanta, GA", "lat": 33.7501, "lng": -84.3885, "count": 2}])
+        detail = self.client.get(reverse("home.applicant_map_location"), {"location": "Atlanta, GA"}).json()
+        self.assertEqual(sorted(a["applicant_name"] for a in detail["applicants"]), ["joe", "sue"])
+
+
+class SavedSearchMatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.recruiter = User.objects.create_user(username="rec", password="pw")
+        self.recruiter.profile.is_recruiter = True
+        self.recruiter.profile.save()
+        for name in ("ann", "bob"):
+            user = User.objects.create_user(username=name, password="pw")
+            user.profile.skills = "Python, Django"
+            user.profile.save()
+
+    def test_records_only_new_matches(self):
+        s = SavedCandidateSearch.objects.create(owner=self.recruiter, name="py", keywords="python")
+        self.assertEqual(run_search_and_record_new_matches(s), 2)
+        self.assertEqual(run_search_and_record_new_matches(s), 0)
+        self.assertEqual(SavedCandidateMatch.objects.filter(search=s).count(), 2)
+        s.refresh_from_db()
+        self.assertIsNotNone(s.last_run_at)
+
+    def test_profile_edit_matches_only_that_profile(self):
+        s = SavedCandidateSearch.objects.create(owner=self.recruiter, name="rust", keywords="rust")
+        carl = User.objects.create_user(username="carl", password="pw")
+        carl.profile.skills = "Rust"
+        carl.profile.save()
+        self.assertEqual(list(SavedCandidateMatch.objects.filter(search=s).values_list("candidate__username", flat=True)), ["carl"])
+        s.refresh_from_db()
+        self.assertIsNone(s.last_run_at)
+
+        carl.profile.save()
+        self.assertEqual(SavedCandidateMatch.objects.filter(search=s).count(), 1)
+
+    def test_run_saved_searches_sends_one_digest_per_owner(self):
+        self.recruiter.email = "rec@example.com"
+        self.recruiter.save()
+        SavedCandidateSearch.objects.create(owner=self.recruiter, name="py", keywords="python")
+        SavedCandidateSearch.objects.create(owner=self.recruiter, name="dj", keywords="django")
+        call_command("run_saved_searches", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("4 new candidate matches", mail.outbox[0].subject)
+        self.assertFalse(SavedCandidateSearch.objects.filter(last_notified_at__isnull=True).exists())
+
+        call_command("run_saved_searches", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_min_years_experience_uses_parsed_years(self):
+        self.assertEqual(parse_years_experience("5+ years backend, 2 yrs lead"), 5)
+        self.assertEqual(parse_years_experience("Recent graduate"), 0)
+
+        senior = User.objects.get(username="ann").profile
+        senior.experience = "7 years building Django apps"
+        senior.save()
+        self.assertEqual(senior.years_experience, 7)
+
+        s = SavedCandidateSearch.objects.create(
+            owner=self.recruiter, name="senior", keywords="python", min_years_experience=5
+        )
+        self.assertEqual(run_search_and_record_new_matches(s), 1)
+
+    def test_unread_badge_uses_counter_and_etag(self):
+        s = SavedCandidateSearch.objects.create(owner=self.recruiter, name="py", keywords="python")
+        run_search_and_record_new_matches(s)
+
+        self.client.login(username="rec", password="pw")
+        url = reverse("saved_search_unread_count")
+        resp = self.client.get(url)
+        self.assertEqual(resp.json(), {"count": 2})
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertFalse([q for q in queries if "home_savedcandidatematch" in q["sql"]])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", {resp["ETag"]}').status_code, 304)
+        # a tag that merely contains the current one is a different version
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"x{resp["ETag"][1:]}').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SavedCandidateMatch.objects.filter(search=s).first().candidate.delete()
+        self.assertEqual(self.client.get(url).json(), {"count": 1})
+
+        self.client.get(reverse("saved_search_mark_seen"))
+        self.assertEqual(self.client.get(url).json(), {"count": 0})
+
+
+class JobFacetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+
+    def _counts(self, facet):
+        return dict(
+            JobFacetCount.objects.filter(facet=facet, count__gt=0).values_list("value", "count")
+        )
+
+    def test_counts_follow_job_save_and_delete(self):
+        a = Job.objects.create(user=self.owner, title="A", location="Atlanta, GA", category="Tech", salary=60000)
+        Job.objects.create(user=self.owner, title="B", location="Atlanta, GA", category="Sales", salary=160000)
+        self.assertEqual(self._counts("location"), {"Atlanta, GA": 2})
+        self.assertEqual(self._counts("salary"), {"50k-100k": 1, "150k+": 1})
+
+        a.location = "Austin, TX"
+        a.save()
+        self.assertEqual(self._counts("location"), {"Atlanta, GA": 1, "Austin, TX": 1})
+
+        a.delete()
+        self.assertEqual(self._counts("category"), {"Sales": 1})
+
+    def test_drifted_counts_clamp_at_zero(self):
+        job = Job.objects.create(user=self.owner, title="A", location="  Denver, CO ", category="Ops")
+        self.assertEqual(job.location, "Denver, CO")
+        JobFacetCount.objects.filter(value="Ops").update(count=0)
+        job.delete()
+        self.assertEqual(JobFacetCount.objects.get(value="Ops").count, 0)
+
+    def test_index_drill_down(self):
+        Job.objects.create(user=self.owner, title="Analyst", category="Tech", salary=60000)
+        Job.objects.create(user=self.owner, title="Closer", category="Sales", salary=60000)
+        resp = self.client.get(reverse("home.index"), {"category": "Sales"})
+        self.assertContains(resp, "Closer")
+        self.assertNotContains(resp, "Analyst")
+
+
+class JobSearchCacheTests(TestCase):
+    def setUp(self):
+        caches["search"].clear()
+        self.owner = User.objects.create_user(username="owner", password="pw")
+
+    def test_repeat_search_hits_cache_and_job_save_invalidates(self):
+        Job.objects.create(user=self.owner, title="Python Developer", salary=90000)
+        self.client.get(reverse("home.index"), {"search": "python"})
+        self.client.get(reverse("home.index"), {"search": "  Python "})
+        self.assertEqual(search_cache.stats()["hits"], 1)
+
+        Job.objects.create(user=self.owner, title="Senior Python Engineer", salary=150000)
+        resp = self.client.get(reverse("home.index"), {"search": "python"})
+        self.assertContains(resp, "Senior Python Engineer")
+        self.assertEqual(search_cache.stats()["misses"], 2)
+
+    def test_generation_is_shared_and_bad_salary_rejected(self):
+        before = search_cache.current_generation()
+        Job.objects.create(user=self.owner, title="Python Developer", salary=90000)
+        self.assertEqual(SharedVersion.objects.get(name="jobsearch").value, before + 1)
+
+        resp = self.client.get(reverse("home.index"), {"search": "python", "min_salary": "lots"})
+        self.assertEqual(resp.status_code, 400)
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        typeahead.reset_index()
+        self.owner = User.objects.create_user(username="owner", password="pw")
+
+    def test_prefix_and_word_matches_follow_job_changes(self):
+        Job.objects.create(user=self.owner, title="Python Developer", location="Atlanta, GA")
+        url = reverse("home.typeahead")
+        resp = self.client.get(url, {"field": "title", "q": "dev"})
+        self.assertEqual(resp.json()["suggestions"], [{"value": "Python Developer", "count": 1}])
+
+        Job.objects.create(user=self.owner, title="Data Engineer", location="Atlanta, GA")
+        resp = self.client.get(url, {"field": "location", "q": "atl"})
+        self.assertEqual(resp.json()["suggestions"], [{"value": "Atlanta, GA", "count": 2}])
+
+        Job.objects.filter(title="Python Developer").delete()
+        resp = self.client.get(url, {"field": "title", "q": "py"})
+        self.assertEqual(resp.json()["suggestions"], [])
+
+    def test_ranking_considers_every_prefix_match(self):
+        field = _FieldIndex()
+        field.load([f"Dev {i:04d}" for i in range(500)] + ["Dev Zulu"] * 3)
+        # short prefixes are served from the precomputed top lists, longer ones by a scan
+        for prefix in ("d", "de", "dev", "zu"):
+            self.assertEqual(field.search(prefix, 1), [{"value": "Dev Zulu", "count": 3}])
+
+        for _ in range(3):
+            field.remove("Dev Zulu")
+        field.add("Dev 0499")
+        self.assertEqual(field.search("d", 2), [{"value": "Dev 0499", "count": 2}, {"value": "Dev 0000", "count": 1}])
+        self.assertEqual(field.search("zu", 1), [])
+
+    def test_candidate_fields_require_recruiter(self):
+        resp = self.client.get(reverse("home.typeahead"), {"field": "skill", "q": "py"})
+        self.assertEqual(resp.status_code, 403)
+
+
+class CandidateSearchTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user(username="rec", password="pw")
+        self.recruiter.profile.is_recruiter = True
+        self.recruiter.profile.save()
+
+    def _candidate(self, username, **profile_fields):
+        user = User.objects.create_user(username=username, password="pw")
+        for field, value in profile_fields.items():
+            setattr(user.profile, field, value)
+        user.profile.save()
+        return user
+
+    def test_only_recruiter_visible_fields_are_returned(self):
+        self._candidate("visible", skills="Rust", show_skills_to_recruiters=True, phone="5551234")
+        self._candidate("hidden", skills="Go", show_skills_to_recruiters=False)
+        self._candidate("private", skills="Java", show_skills_to_recruiters=True, visibility="PRIVATE")
+
+        self.client.login(username="rec", password="pw")
+        resp = self.client.get(reverse("home.candidates"))
+        profiles = resp.context["profiles"]
+        self.assertEqual([p["username"] for p in profiles], ["visible"])
+        self.assertEqual(profiles[0]["skills"], "Rust")
+        self.assertIsNone(profiles[0]["phone"])
+
+
+class EventStreamTests(TestCase):
+    def _scope(self, cookie=b""):
+        return {"type": "http", "path": EVENTS_PATH, "method": "GET", "headers": [(b"cookie", cookie)]}
+
+    def test_anonymous_stream_is_forbidden(self):
+        async def run():
+            comm = ApplicationCommunicator(event_stream, self._scope())
+            await comm.send_input({"type": "http.request"})
+            return await comm.receive_output(1)
+
+        self.assertEqual(async_to_sync(run)()["status"], 403)
+
+    def test_published_events_reach_the_users_stream(self):
+        user = User.objects.create_user(username="rec", password="pw")
+        self.client.login(username="rec", password="pw")
+        session_cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.session.session_key}".encode()
+
+        async def run():
+            comm = ApplicationCommunicator(event_stream, self._scope(session_cookie))
+            await comm.send_input({"type": "http.request"})
+            start = await comm.receive_output(1)
+            await sync_to_async(publish_to_user)(user.id, "message", {"preview": "hi"})
+            body = await comm.receive_output(1)
+            await comm.send_input({"type": "http.disconnect"})
+            await comm.wait(1)
+            return start, body
+
+        start, body = async_to_sync(run)()
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(body["body"], b'event: message\ndata: {"preview": "hi"}\n\n')
+
+
+class GeocodingCacheTests(TestCase):
+    def setUp(self):
+        geocoding.clear_memory_cache()
+
+    def _response(self, payload):
+        return mock.Mock(json=mock.Mock(return_value=payload))
+
+    def test_repeated_and_failed_addresses_hit_the_provider_once(self):
+        ok = self._response({"status": "OK", "results": [{"geometry": {"location": {"lat": 37.77, "lng": -122.42}}}]})
+        with mock.patch("home.services.geocoders.requests.get", return_value=ok) as get:
+            self.assertEqual(geocoding.geocode("San Francisco, CA"), (37.77, -122.42))
+            geocoding.clear_memory_cache()
+            self.assertEqual(geocoding.geocode("  san francisco,CA "), (37.77, -122.42))
+        self.assertEqual(get.call_count, 1)
+
+        missing = self._response({"status": "ZERO_RESULTS", "results": []})
+        with mock.patch("home.services.geocoders.requests.get", return_value=missing) as get:
+            self.assertEqual(geocoding.geocode("Nowhere"), (None, None))
+            self.assertEqual(geocoding.geocode("Nowhere"), (None, None))
+        self.assertEqual(get.call_count, 1)
+
+    def test_offline_backends(self):
+        with override_settings(GEOCODER_BACKEND="home.services.geocoders.GazetteerGeocoder"):
+            self.assertEqual(geocoding.geocode("Austin, TX, USA"), (30.2672, -97.7431))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            fixture = Path(tmp) / "geocodes.json"
+            recording = {
+                "path": str(fixture),
+                "record_with": "home.services.geocoders.GazetteerGeocoder",
+            }
+            with override_settings(GEOCODER_BACKEND="home.services.geocoders.FixtureGeocoder",
+                                   GEOCODER_OPTIONS=recording):
+                geocoding.geocode("Boston, MA")
+            self.assertEqual(json.loads(fixture.read_text()), {"boston, ma": ["OK", 42.3601, -71.0589]})
+
+            geocoding.clear_memory_cache()
+            GeocodeCacheEntry.objects.all().delete()
+            with override_settings(GEOCODER_BACKEND="home.services.geocoders.FixtureGeocoder",
+                                   GEOCODER_OPTIONS={"path": str(fixture)}):
+                self.assertEqual(geocoding.geocode("boston,  MA"), (42.3601, -71.0589))
+                self.assertEqual(geocoding.geocode("Denver, CO"), (None, None))
+
+    def test_geocode_jobs_resolves_each_location_once(self):
+        owner = User.objects.create_user(username="owner", password="pw")
+        for location in ("Austin, TX", "austin,  TX", "Remote", "Atlantis"):
+            Job.objects.create(user=owner, title="Role", location=location)
+
+
+        lookup = mock.Mock(side_effect=GazetteerGeocoder().lookup)
+        with tempfile.TemporaryDirectory() as tmp, self.settings(STORAGES=_snapshot_storages(tmp)), \
+                mock.patch("home.management.commands.geocode_jobs.lookup_uncached", lookup):
+            call_command("geocode_jobs", "--qps", "1000", "--retries", "0", stdout=StringIO())
+            # "Atlantis" is cached as not found and is not asked for again
+            call_command("geocode_jobs", "--qps", "1000", "--retries", "0", stdout=StringIO())
+
+        self.assertEqual(lookup.call_count, 2)
+        self.assertEqual(Job.objects.filter(latitude=30.2672, longitude=-97.7431).count(), 2)
+
+    def test_job_create_and_edit_geocode_after_commit(self):
+        owner = User.objects.create_user(username="poster", password="pw")
+        self.client.force_login(owner)
+        with override_settings(GEOCODE_ASYNC=False, MAP_SNAPSHOT_ASYNC=False,
+                               GEOCODER_BACKEND="home.services.geocoders.GazetteerGeocoder"):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self.client.post(reverse("home.create"), {"title": "Dev", "location": "Austin, TX", "salary": "1"})
+            job = Job.objects.get(title="Dev")
+            # the request itself never waits on the geocoder
+            self.assertEqual(job.geocode_status, Job.GeocodeStatus.PENDING)
+            self.assertIsNone(job.latitude)
+            for callback in callbacks:
+                callback()
+            job.refresh_from_db()
+            self.assertEqual((job.geocode_status, job.latitude), (Job.GeocodeStatus.OK, 30.2672))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("home.edit", args=[job.id]), {"title": "Dev", "location": "Atlantis", "salary": "1"})
+            job.refresh_from_db()
+            self.assertEqual((job.geocode_status, job.latitude), (Job.GeocodeStatus.FAILED, None))
+
+            self.client.post(reverse("home.create"), {"title": "Anywhere", "location": "Remote", "salary": "1"})
+            self.assertEqual(Job.objects.get(title="Anywhere").geocode_status, Job.GeocodeStatus.SKIPPED)
+
+
+def _snapshot_storages(location):
+    storages = dict(settings.STORAGES)
+    storages["map_snapshots"] = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": location, "base_url": settings.MAP_SNAPSHOT_URL},
+    }
+    return storages
+
+
+class JobMapQueryTests(TestCase):
+    def setUp(self):
+        geocoding.clear_memory_cache()
+        self.owner = User.objects.create_user(username="mapper", password="pw")
+        self.client.force_login(self.owner)
+        for title, location, lat, lng in [
+            ("A", "Austin, TX", 30.2672, -97.7431),
+            ("B", "San Antonio, TX", 29.4241, -98.4936),
+            ("C", "Dallas, TX", 32.7767, -96.7970),
+            ("D", "Suva, Fiji", -18.1416, 178.4419),
+        ]:
+            Job.objects.create(user=self.owner, title=title, location=location, latitude=lat, longitude=lng)
+
+    def test_radius_query_prefilters_with_bounding_box(self):
+        with override_settings(GEOCODER_BACKEND="home.services.geocoders.GazetteerGeocoder"):
+            response = self.client.get(reverse("home.map_data_api"), {"location": "Austin, TX", "distance": "100"})
+        self.assertEqual(sorted(c["location"] for c in response.json()), ["Austin, TX", "San Antonio, TX"])
+
+        response = self.client.get(reverse("home.map_data_api"))
+        self.assertEqual(len(response.json()), 4)
+
+    def test_bounding_box_wraps_the_antimeridian(self):
+        # Fiji's neighbours across 180° must survive the prefilter
+        nearby = Job.objects.filter(bounding_box_q(-17.0, -179.5, 200))
+        self.assertEqual(list(nearby.values_list("title", flat=True)), ["D"])
+
+    def test_nearest_and_radius_over_cached_coordinates(self):
+        austin = (30.2672, -97.7431)
+        closest = list(Job.objects.filter(title__in=["A", "B"]).order_by("title").values_list("id", flat=True))
+        # the vectorized path and the pure-Python fallback must agree
+        for np_module in ([distance.np] if distance.np is not None else []) + [None]:
+            with self.subTest(numpy=np_module is not None), mock.patch.object(distance, "np", np_module):
+                distance.invalidate()
+                self.assertEqual([j for j, _ in distance.nearest(*austin, 2)], closest)
+                self.assertEqual(len(distance.nearest(*austin, 10, max_distance=200)), 3)
+                miles = distance.distances_from(*austin, [32.7767], [-96.797])
+                self.assertAlmostEqual(float(miles[0]), 182.1, delta=0.5)
+        distance.invalidate()
+
+        # saving a job refreshes the arrays
+        Job.objects.create(user=self.owner, title="E", location="Round Rock, TX", latitude=30.5083, longitude=-97.6789)
+        self.assertEqual(len(distance.nearest(*austin, 10, max_distance=200)), 4)
+
+        with self.settings(GEOCODER_BACKEND="home.services.geocoders.GazetteerGeocoder"):
+            response = self.client.get(reverse("home.map_data_api"), {"location": "Austin, TX", "nearest": "1"})
+        self.assertEqual([c["location"] for c in response.json()], ["Austin, TX"])
+
+    def test_viewport_returns_clusters_then_jobs_when_zoomed_in(self):
+        Job.objects.get(title="B").delete()
+        austin = Job.objects.get(title="A")
+        austin.category = "Engineering"
+        austin.save()
+
+        url = reverse("home.map_data_api")
+        data = self.client.get(url, {"bounds": "24,-125,50,-66", "zoom": "4"}).json()
+        self.assertEqual(sum(c["count"] for c in data["clusters"]), 2)
+        categories = {}
+        for cluster in data["clusters"]:
+            for category, count in cluster["categories"].items():
+                categories[category] = categories.get(category, 0) + count
+        self.assertEqual(categories, {"Engineering": 1, "Other": 1})
+
+        data = self.client.get(url, {"bounds": "30.2,-97.8,30.3,-97.7", "zoom": "14"}).json()
+        self.assertEqual(data["clusters"], [])
+        self.assertEqual([c["location"] for c in data["locations"]], ["Austin, TX"])
+
+        # the Pacific viewport wraps the antimeridian
+        data = self.client.get(url, {"bounds": "-30,170,0,-170", "zoom": "3"}).json()
+        self.assertEqual(sum(c["count"] for c in data["clusters"]), 1)
+
+    def test_drifted_map_cells_clamp_and_prune(self):
+        austin = Job.objects.get(title="A")
+        zoom, x, y, category = job_cells(austin.latitude, austin.longitude, austin.category)[-1]
+        cell = JobMapCell.objects.filter(zoom=zoom, x=x, y=y, category=category)
+        cell.update(count=0)
+        austin.delete()
+        self.assertFalse(cell.exists())
+
+    def test_geojson_snapshots_are_content_addressed(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                self.settings(STORAGES=_snapshot_storages(tmp), MAP_SNAPSHOT_ASYNC=False):
+            manifest_url = reverse("home.map_snapshot_manifest")
+            # nothing built yet: the view reports it and never builds on the request path
+            self.assertEqual(self.client.get(manifest_url).json(), {"stale": True, "all": None, "categories": {}})
+
+            build_snapshots()
+            response = self.client.get(manifest_url)
+            manifest = response.json()
+            self.assertFalse(manifest["stale"])
+            self.assertIn("max-age=60", response["Cache-Control"])
+            self.assertEqual(manifest["all"]["count"], 4)
+
+            response = self.client.get(manifest["all"]["url"], HTTP_ACCEPT_ENCODING="gzip, deflate")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("Accept-Encoding", response["Vary"])
+            self.assertIn("immutable", response["Cache-Control"])
+            features = json.loads(gzip.decompress(b"".join(response.streaming_content)))["features"]
+            self.assertEqual(sorted(f["properties"]["title"] for f in features), ["A", "B", "C", "D"])
+
+            # clients that cannot take gzip get the same GeoJSON inflated
+            response = self.client.get(manifest["all"]["url"])
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(json.loads(b"".join(response.streaming_content))["features"], features)
+
+            # unchanged jobs keep the same URL; a change marks the manifest stale until rebuilt
+            build_snapshots()
+            self.assertEqual(self.client.get(manifest_url).json(), manifest)
+            Job.objects.create(user=self.owner, title="E", category="Design", location="Austin, TX",
+                               latitude=30.2672, longitude=-97.7431)
+            response = self.client.get(manifest_url)
+            self.assertTrue(response.json()["stale"])
+            self.assertEqual(response.json()["all"], manifest["all"])
+            self.assertEqual(response["Cache-Control"], "no-cache")
+
+            build_snapshots()
+            updated = self.client.get(manifest_url).json()
+            self.assertFalse(updated["stale"])
+            self.assertNotEqual(updated["all"]["url"], manifest["all"]["url"])
+            self.assertEqual(updated["categories"]["Design"]["count"], 1)
+            self.assertEqual(self.client.get("/map/snapshots/../manifest.json").status_code, 404)
+
+    def test_nearby_api_expands_geohash_rings(self):
+        self.assertEqual(Job.objects.get(title="A").geohash[:5], "9v6kp")
+        Job.objects.create(user=self.owner, title="Designer", category="Design", salary=90000,
+                           location="Round Rock, TX", latitude=30.5083, longitude=-97.6789)
+
+        url = reverse("home.jobs_nearby")
+        results = self.client.get(url, {"lat": "30.27", "lng": "-97.74", "k": "3"}).json()["results"]
+        self.assertEqual([r["title"] for r in results], ["A", "Designer", "B"])
+        self.assertLess(results[0]["distance_miles"], 1)
+
+        results = self.client.get(url, {"lat": "30.27", "lng": "-97.74", "k": "5", "category": "design"}).json()["results"]
+        self.assertEqual([r["title"] for r in results], ["Designer"])
+        results = self.client.get(url, {"lat": "30.27", "lng": "-97.74", "k": "2", "min_salary": "100000"}).json()["results"]
+        self.assertEqual(results, [])
+        self.assertEqual(self.client.get(url, {"lat": "x"}).status_code, 400)
@@ -3,6 +3,9 @@ from . import views
 urlpatterns = [
     path('', views.index, name='home.index'),
     path('about/', views.about, name='home.about'),
+    path('api/search_cache_stats/', views.search_cache_stats, name='home.search_cache_stats'),
+    path('api/typeahead/', views.typeahead_api, name='home.typeahead'),
+    path('api/typeahead/stats/', views.typeahead_stats, name='home.typeahead_stats'),
     path('<int:id>/', views.show, name='home.show'),
     path('<int:id>/apply/', views.apply_job, name='home.apply'),
     path('<int:id>/move/', views.move_app, name='home.move_app'),
@@ -28,7 +31,11 @@ urlpatterns = [
     path("notifications/mark-seen", views.saved_search_mark_seen, name="saved_search_mark_seen"),
     path('job_map/', views.job_map, name='home.job_map'),
     path('api/map_data_api/', views.map_data_api, name='home.map_data_api'),
+    path('api/map_snapshot/', views.map_snapshot_manifest, name='home.map_snapshot_manifest'),
+    path('api/jobs/nearby/', views.jobs_nearby_api, name='home.jobs_nearby'),
+    path('map/snapshots/<str:name>', views.map_snapshot_file, name='home.map_snapshot_file'),
     # map clustering URLs
     path('recruiter/applicant-map/', views.applicant_map, name='home.applicant_map'),
     path('api/applicant_map_data/', views.applicant_map_data_api, name='home.applicant_map_data'),
+    path('api/applicant_map_data/location/', views.applicant_map_location_api, name='home.applicant_map_location'),
 ]
@@ -8,15 +8,57 @@ from decimal import Decimal
 from accounts.models import Profile
 from .recommendations import generate_candidate_recommendations, generate_job_recommendations
 from django.db import models
-from django.http import JsonResponse, HttpResponseForbidden, Http404
+from django.http import FileResponse, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotModified, Http404
+from django.utils.http import parse_etags, quote_etag
 from django.db.models import Prefetch
 from django.conf import settings
 from home.forms import SavedCandidateSearchForm
-from home.models import SavedCandidateSearch, SavedCandidateMatch
+from home.models import SavedCandidateSearch, SavedCandidateMatch, JobFacetCount
+from home.services.facets import facet_counts, salary_bucket_q
+from home.services import search_cache, typeahead
+from home.services import distance, map_clusters, map_snapshots
+from home.services.applicant_locations import fill_from_profile
+from home.services.geo import bounding_box_q
+from home.services.geocoding import geocode
+from home.services.geocode_queue import enqueue_job_geocode, initial_status, needs_geocoding
+from home.services.nearby import nearest_jobs
+from home.services.notifications import clear_unread, unread_count
 from home.services.saved_searches import run_search_and_record_new_matches
+import gzip
 import math
-
-import requests
+import re
+
+# Query-string parameter used to drill down on each facet of the job index
+FACET_PARAMS = OrderedDict([
+    (JobFacetCount.Facet.CATEGORY, "category"),
+    (JobFacetCount.Facet.LOCATION, "location"),
+    (JobFacetCount.Facet.SALARY, "salary_range"),
+])
+
+def _facet_navigation(request):
+    # Counts come from the precomputed JobFacetCount table, not the filtered queryset
+    counts = facet_counts()
+    facets = []
+    for facet, param in FACET_PARAMS.items():
+        selected = request.GET.get(param, "")
+        items = []
+        for value, label, count in counts[facet.value]:
+            query = request.GET.copy()
+            query.pop("page", None)
+            if value == selected:
+                query.pop(param, None)
+            else:
+                query[param] = value
+            items.append({
+                "label": label,
+                "count": count,
+                "active": value == selected,
+                "url": "?" + query.urlencode(),
+            })
+        facets.append({"name": facet.label, "param": param, "selected": selected, "items": items})
+    return facets
+
+JOBS_PAGE_SIZE = 24
 
 # Create your views here.
 def index(request):
@@ -24,32 +66,111 @@ def index(request):
     search_type = request.GET.get('search_type')
     min_salary = request.GET.get('min_salary')
     max_salary = request.GET.get('max_salary')
+    facet_category = request.GET.get('category')
+    facet_location = request.GET.get('location')
+    facet_salary = request.GET.get('salary_range')
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        min_salary = search_cache.parse_salary(min_salary)
+        max_salary = search_cache.parse_salary(max_salary)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid salary filter")
 
-    jobs = Job.objects.all()
     app = Application.objects.all()
 
-    if search_term:
-        if search_type in {'title', 'location', 'category'}:
-            lookup = {f"{search_type}__icontains": search_term}
-        else:
-            lookup = {"title__icontains": search_term}
-        jobs = jobs.filter(**lookup)
-    if min_salary:
-        jobs = jobs.filter(salary__gte=min_salary)
-    if max_salary:
-        jobs = jobs.filter(salary__lte=max_salary)
+    def run_search():
+        jobs = Job.objects.order_by('id')
+
+        if search_term:
+            if search_type in {'title', 'location', 'category'}:
+                lookup = {f"{search_type}__icontains": search_term}
+            else:
+                lookup = {"title__icontains": search_term}
+            jobs = jobs.filter(**lookup)
+        if min_salary is not None:
+            jobs = jobs.filter(salary__gte=min_salary)
+        if max_salary is not None:
+            jobs = jobs.filter(salary__lte=max_salary)
+
+        # Facet drill-down filters
+        if facet_category:
+            jobs = jobs.filter(category=facet_category)
+        if facet_location:
+            jobs = jobs.filter(location=facet_location)
+        if facet_salary and salary_bucket_q(facet_salary) is not None:
+            jobs = jobs.filter(salary_bucket_q(facet_salary))
+
+        offset = (page - 1) * JOBS_PAGE_SIZE
+        return {
+            "ids": list(jobs.values_list('id', flat=True)[offset:offset + JOBS_PAGE_SIZE]),
+            "count": jobs.count(),
+        }
+
+    # Ordered id pages are cached per normalized search; rows are loaded fresh by pk
+    cache_key = search_cache.normalize_search(
+        search_term, search_type, min_salary, max_salary, page,
+        facets={'category': facet_category, 'location': facet_location, 'salary_range': facet_salary},
+    )
+    result = search_cache.get_or_compute(cache_key, run_search)
+    jobs_by_id = Job.objects.in_bulk(result["ids"])
+    jobs = [jobs_by_id[pk] for pk in result["ids"] if pk in jobs_by_id]
+
+    num_pages = max(1, math.ceil(result["count"] / JOBS_PAGE_SIZE))
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
 
     template_data = {
         'title': 'Jobs',
         'jobs': jobs,
+        'job_count': result["count"],
+        'page': page,
+        'num_pages': num_pages,
+        'previous_page': page - 1 if page > 1 else None,
+        'next_page': page + 1 if page < num_pages else None,
+        'page_query': page_query.urlencode(),
         'search_term': search_term or '',
         'search_type': search_type or 'title',
-        'min_salary': min_salary or '',
-        'max_salary': max_salary or '',
+        'min_salary': request.GET.get('min_salary') or '',
+        'max_salary': request.GET.get('max_salary') or '',
+        'facets': _facet_navigation(request),
         'applications': app
     }
     return render(request, 'home/index.html', {'template_data': template_data})
 
+# Hit/miss counters for tuning the job-search result cache (staff only)
+@login_required
+def search_cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    return JsonResponse(search_cache.stats())
+
+# Autocomplete for the job search box and the candidate skills/location filters
+CANDIDATE_TYPEAHEAD_FIELDS = {"skill", "candidate_location"}
+
+def typeahead_api(request):
+    field = request.GET.get("field", "title")
+    prefix = (request.GET.get("q") or "").strip()
+    if field not in typeahead.FIELDS:
+        return JsonResponse({"error": "Unknown field"}, status=400)
+    if field in CANDIDATE_TYPEAHEAD_FIELDS and not _must_be_recruiter(request.user):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    try:
+        limit = min(max(int(request.GET.get("limit", 8)), 1), 20)
+    except (TypeError, ValueError):
+        limit = 8
+    suggestions = typeahead.suggest(field, prefix, limit) if prefix else []
+    return JsonResponse({"field": field, "query": prefix, "suggestions": suggestions})
+
+# Memory footprint and size of the in-process typeahead index (staff only)
+@login_required
+def typeahead_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    return JsonResponse(typeahead.stats())
+
 def about(request):
     return render(request, 'home/about.html')
 
@@ -89,13 +210,6 @@ def create_job(request):
         except (TypeError, ValueError):
             salary = 0
 
-        # Get latitude/longitude safely
-        lat, lng = geocode_location(location)
-        if lat is not None:
-            lat = float(lat)
-        if lng is not None:
-            lng = float(lng)
-
         job = Job.objects.create(
             user=request.user,
             title=title,
@@ -103,10 +217,13 @@ def create_job(request):
             location=location,
             salary=salary,
             category=category,
-            latitude=lat,
-            longitude=lng
+            geocode_status=initial_status(location),
         )
 
+        # Coordinates are filled in by the background geocoder
+        if needs_geocoding(location):
+            enqueue_job_geocode(job.id)
+
         # Optional: generate candidate recommendations
         generate_candidate_recommendations(job.id)
 
@@ -137,13 +254,12 @@ def edit_job(request, id):
         except (TypeError, ValueError):
             new_salary = 0
 
-        # Update latitude/longitude if location changed
-        if new_location != job.location:
-            lat, lng = geocode_location(new_location)
-            if lat is not None:
-                job.latitude = float(lat)
-            if lng is not None:
-                job.longitude = float(lng)
+        # Re-geocode in the background if location changed
+        location_changed = new_location != job.location
+        if location_changed:
+            job.latitude = None
+            job.longitude = None
+            job.geocode_status = initial_status(new_location)
 
         # Update fields
         job.title = new_title
@@ -153,6 +269,8 @@ def edit_job(request, id):
         job.category = new_category
 
         job.save()
+        if location_changed and needs_geocoding(new_location):
+            enqueue_job_geocode(job.id)
         generate_candidate_recommendations(job.id)
 
         return redirect('home.show', id=job.id)
@@ -170,13 +288,23 @@ def apply_job(request, id):
 
     # Enforce single application per user per job; update note if already exists.
     from .models import Application
+    # Snapshot the applicant's location for the recruiter's applicant map
+    located = Application(job=job, applicant=request.user)
+    fill_from_profile(located, getattr(request.user, "profile", None))
+    location_fields = {
+        "applicant_location": located.applicant_location,
+        "applicant_lat": located.applicant_lat,
+        "applicant_lng": located.applicant_lng,
+    }
     app, created = Application.objects.get_or_create(
-        job=job, applicant=request.user, defaults={"note": note}
+        job=job, applicant=request.user, defaults={"note": note, **location_fields}
     )
     if not created:
         app.note = note
         app.status = Application.Status.SUBMITTED
-        app.save(update_fields=["note", "status", "updated_at"])
+        for field, value in location_fields.items():
+            setattr(app, field, value)
+        app.save(update_fields=["note", "status", *location_fields, "updated_at"])
         messages.success(request, "Application updated.")
     else:
         messages.success(request, "Application submitted.")
@@ -188,6 +316,21 @@ def apply_job(request, id):
 
     return redirect("home.show", id=job.id)
 
+CANDIDATES_PAGE_SIZE = 30
+# Profile field -> recruiter toggle that must be on for the field to be shown
+RECRUITER_VISIBLE_FIELDS = [
+    ("firstName", "show_firstName_to_recruiters"),
+    ("lastName", "show_lastName_to_recruiters"),
+    ("email", "show_email_to_recruiters"),
+    ("phone", "show_phone_to_recruiters"),
+    ("location", "show_location_to_recruiters"),
+    ("skills", "show_skills_to_recruiters"),
+    ("projects", "show_projects_to_recruiters"),
+    ("education", "show_education_to_recruiters"),
+    ("experience", "show_experience_to_recruiters"),
+    ("resume_url", "show_resume_to_recruiters"),
+]
+
 @login_required
 def candidates(request):
     # Only recruiters can view
@@ -196,7 +339,6 @@ def candidates(request):
 
     profiles = (
         Profile.objects
-        .select_related("user")
         .filter(
             is_recruiter=False,
             user__is_active=True,
@@ -213,6 +355,7 @@ def candidates(request):
     search_skills = (request.GET.get("skills") or "").strip()
     search_location = (request.GET.get("location") or "").strip()
     search_name = (request.GET.get("name") or "").strip()
+    search_min_years = (request.GET.get("min_years_experience") or "").strip()
     filter_job_id = request.GET.get("job")
 
     if search_skills:
@@ -225,6 +368,8 @@ def candidates(request):
             models.Q(lastName__icontains=search_name) |
             models.Q(user__username__icontains=search_name)
         )
+    if search_min_years.isdigit() and int(search_min_years) > 0:
+        profiles = profiles.filter(years_experience__gte=int(search_min_years))
 
     # Filter by job applicants
     filtered_by_job = None
@@ -237,45 +382,64 @@ def candidates(request):
         except Job.DoesNotExist:
             pass
 
-    safe_profiles = []
-    for profile in profiles:
-        if getattr(Profile, "Visibility", None) and profile.visibility == Profile.Visibility.PRIVATE:
-            continue
+    # Privacy rules are applied in SQL: PRIVATE profiles and profiles with nothing
+    # recruiter-visible are filtered out, and hidden fields are never selected.
+    profiles = profiles.exclude(visibility=Profile.Visibility.PRIVATE).filter(
+        models.Q(show_firstName_to_recruiters=True, firstName__gt="") |
+        models.Q(show_lastName_to_recruiters=True, lastName__gt="") |
+        models.Q(show_skills_to_recruiters=True, skills__gt="") |
+        models.Q(show_location_to_recruiters=True, location__gt="") |
+        models.Q(show_experience_to_recruiters=True, experience__gt="")
+    )
+    visible_fields = {
+        f"visible_{field}": models.Case(
+            models.When(**{toggle: True}, then=models.F(field)),
+            default=models.Value(None),
+            output_field=models.TextField(),
+        )
+        for field, toggle in RECRUITER_VISIBLE_FIELDS
+    }
 
-        # Skip if no meaningful data to show
-        has_data = any([
-            getattr(profile, "show_firstName_to_recruiters", False) and profile.firstName,
-            getattr(profile, "show_lastName_to_recruiters", False) and profile.lastName,
-            getattr(profile, "show_skills_to_recruiters", False) and profile.skills,
-            getattr(profile, "show_location_to_recruiters", False) and profile.location,
-            getattr(profile, "show_experience_to_recruiters", False) and profile.experience,
-        ])
+    # Keyset pagination on the profile id: one bounded query per page
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+    if before and before.isdigit():
+        page = profiles.filter(id__lt=int(before)).order_by("-id")
+    else:
+        page = profiles.order_by("id")
+        if after and after.isdigit():
+            page = page.filter(id__gt=int(after))
+    rows = list(page.values("id", "user__username", **visible_fields)[:CANDIDATES_PAGE_SIZE + 1])
+    has_more = len(rows) > CANDIDATES_PAGE_SIZE
+    rows = rows[:CANDIDATES_PAGE_SIZE]
+    if before and before.isdigit():
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(after and after.isdigit())
 
-        if not has_data:
-            continue
+    safe_profiles = []
+    for row in rows:
+        profile = {field: row[f"visible_{field}"] for field, _ in RECRUITER_VISIBLE_FIELDS}
+        profile["username"] = row["user__username"] or None
+        safe_profiles.append(profile)
 
-        safe_profiles.append({
-            "firstName": profile.firstName if getattr(profile, "show_firstName_to_recruiters", False) else None,
-            "lastName": profile.lastName if getattr(profile, "show_lastName_to_recruiters", False) else None,
-            "email": profile.email if getattr(profile, "show_email_to_recruiters", False) else None,
-            "phone": profile.phone if getattr(profile, "show_phone_to_recruiters", False) else None,
-            "location": profile.location if getattr(profile, "show_location_to_recruiters", False) else None,
-            "skills": profile.skills if getattr(profile, "show_skills_to_recruiters", False) else None,
-            "projects": profile.projects if getattr(profile, "show_projects_to_recruiters", False) else None,
-            "education": profile.education if getattr(profile, "show_education_to_recruiters", False) else None,
-            "experience": profile.experience if getattr(profile, "show_experience_to_recruiters", False) else None,
-            "resume_url": profile.resume_url if getattr(profile, "show_resume_to_recruiters", False) else None,
-            "username": (profile.user.username if profile.user and profile.user.username else None),
-        })
+    page_query = request.GET.copy()
+    page_query.pop("after", None)
+    page_query.pop("before", None)
 
     context = {
         "profiles": safe_profiles,
         "search_skills": search_skills,
         "search_location": search_location,
         "search_name": search_name,
+        "search_min_years": search_min_years,
         "recruiter_jobs": recruiter_jobs,
         "filter_job_id": filter_job_id,
         "filtered_by_job": filtered_by_job,
+        "next_after": rows[-1]["id"] if rows and has_next else None,
+        "previous_before": rows[0]["id"] if rows and has_previous else None,
+        "page_query": page_query.urlencode(),
     }
     return render(request, "home/candidates.html", context)
 
@@ -562,16 +726,29 @@ def saved_search_matches(request, pk):
 def saved_search_unread_count(request):
     if not _must_be_recruiter(request.user):
         return JsonResponse({"count": 0})
-    count = SavedCandidateMatch.objects.filter(search__owner=request.user, seen=False).count()
-    return JsonResponse({"count": count})
+    # Served from the denormalized counter; unchanged counts revalidate with a 304
+    count = unread_count(request.user.id)
+    etag = quote_etag(f"unread-{request.user.id}-{count}")
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({"count": count})
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 @login_required
 def saved_search_mark_seen(request):
     if not _must_be_recruiter(request.user):
         return JsonResponse({"ok": False})
     SavedCandidateMatch.objects.filter(search__owner=request.user, seen=False).update(seen=True)
+    clear_unread(request.user.id)
     return JsonResponse({"ok": True})
 
+# Location Map Page: Upper bound for the "nearest" query parameter
+MAP_NEAREST_LIMIT = 200
+
 # Location Map Page: Render map template with Google Maps API key for user
 def job_map(request):
     template_data = {
@@ -580,18 +757,56 @@ def job_map(request):
     }
     return render(request, 'home/job_map.html', {'template_data': template_data})
 
+# Location Map Page: Fields sent per job; the sidebar only shows a short description
+MAP_JOB_FIELDS = ("id", "title", "description", "salary", "date", "category", "location", "latitude", "longitude")
+MAP_DESCRIPTION_CHARS = 100
+
+def _jobs_by_city(jobs):
+    # Location Map Page: Group jobs by the text location for city markers
+    jobs_by_city = OrderedDict()
+    for job in jobs:
+        city = job["location"]
+        if city not in jobs_by_city:
+            jobs_by_city[city] = {
+                "location": city,
+                "lat": job["latitude"],
+                "lng": job["longitude"],
+                "jobs": []
+            }
+        jobs_by_city[city]["jobs"].append({
+            "id": job["id"],
+            "title": job["title"],
+            "description": (job.get("description") or "")[:MAP_DESCRIPTION_CHARS],
+            "salary": job["salary"],
+            "date": job["date"].strftime("%b %d, %Y"),
+            "category": job["category"],
+        })
+    return list(jobs_by_city.values())
+
+def _map_viewport(request):
+    # Location Map Page: Parse "bounds=south,west,north,east" and "zoom", or None if absent/invalid
+    try:
+        south, west, north, east = (float(v) for v in request.GET["bounds"].split(","))
+        zoom = int(request.GET["zoom"])
+    except (KeyError, ValueError):
+        return None
+    if not (-90 <= south <= north <= 90) or zoom < 0:
+        return None
+    return south, west, north, east, zoom
+
 # Location Map Page: API endpoint to filter and return job data based on location/distance
 @login_required
 def map_data_api(request):
-    # Location Map Page: Calculate geographic distance between two points using Haversine formula
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 3958.8  # Earth radius in miles
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
+    # Location Map Page: Viewport mode returns clusters from the precomputed cell table,
+    # and individual jobs only once the map is zoomed in past the cluster levels
+    viewport = _map_viewport(request)
+    if viewport is not None:
+        south, west, north, east, zoom = viewport
+        if zoom > map_clusters.MAX_CLUSTER_ZOOM:
+            jobs = map_clusters.viewport_jobs(south, west, north, east)
+            return JsonResponse({"zoom": zoom, "clusters": [], "locations": _jobs_by_city(jobs)})
+        clusters = map_clusters.viewport_clusters(south, west, north, east, zoom)
+        return JsonResponse({"zoom": zoom, "clusters": clusters, "locations": []})
 
     # Location Map Page: Parse user filters from request parameters
     max_distance = float(request.GET.get("distance") or math.inf)
@@ -599,49 +814,104 @@ def map_data_api(request):
 
     # Location Map Page: Convert user's city to coordinates for distance filtering
     if user_location:
-        user_lat, user_lng = geocode_location(user_location)
+        user_lat, user_lng = geocode(user_location)
     else:
         # No location entered → distance filtering disabled
         user_lat, user_lng = None, None
 
-    jobs_by_city = OrderedDict()
-
-    # Location Map Page: Loop through jobs, filter by distance, group by city
-    for job in Job.objects.order_by("location", "date"):
-        # Must have coordinates (from the geocoding process at job creation)
-        if job.latitude is None or job.longitude is None:
-            continue
-
-        lat, lng = job.latitude, job.longitude
-
-        # Location Map Page: Apply distance filtering if user specified location
-        if user_lat is not None and user_lng is not None:
-            curr_distance = haversine(user_lat, user_lng, lat, lng)
-            if curr_distance > max_distance:
-                continue
+    # Location Map Page: Optional "nearest N jobs" mode, needs a user location
+    try:
+        nearest_count = min(int(request.GET.get("nearest") or 0), MAP_NEAREST_LIMIT)
+    except ValueError:
+        nearest_count = 0
+
+    # Must have coordinates (from the background geocoder)
+    jobs = (
+        Job.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .order_by("location", "date")
+        .values(*MAP_JOB_FIELDS)
+    )
+    has_origin = user_lat is not None and user_lng is not None
+    if has_origin and nearest_count > 0:
+        # Location Map Page: k-nearest over the cached coordinate arrays
+        limit = max_distance if math.isfinite(max_distance) else None
+        nearby_ids = [job_id for job_id, _ in distance.nearest(user_lat, user_lng, nearest_count, limit)]
+        jobs = jobs.filter(id__in=nearby_ids)
+    elif has_origin and math.isfinite(max_distance):
+        # Location Map Page: Indexed bounding-box prefilter, then exact distances in one pass
+        jobs = list(jobs.filter(bounding_box_q(user_lat, user_lng, max_distance)))
+        miles = distance.distances_from(
+            user_lat, user_lng, [job["latitude"] for job in jobs], [job["longitude"] for job in jobs]
+        )
+        jobs = [job for job, m in zip(jobs, miles) if m <= max_distance]
 
-        city = job.location  # Group jobs by the text location
+    return JsonResponse(_jobs_by_city(jobs), safe=False)
 
-        # Location Map Page: Group jobs by city for marker clustering
-        if city not in jobs_by_city:
-            jobs_by_city[city] = {
-                "location": city,
-                "lat": lat,
-                "lng": lng,
-                "jobs": []
-            }
+NEARBY_MAX_RESULTS = 100
 
-        # Location Map Page: Add job details to city's job list
-        jobs_by_city[city]["jobs"].append({
-            "id": job.id,
-            "title": job.title,
-            "description": job.description,
-            "salary": job.salary,
-            "date": job.date.strftime("%b %d, %Y"),
-            "category": job.category,
-        })
+def _float_param(request, name):
+    # None when the parameter is missing or not a number
+    try:
+        value = float(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
 
-    return JsonResponse(list(jobs_by_city.values()), safe=False)
+# Location Map Page: k nearest jobs to a point, using the geohash index on Job
+@login_required
+def jobs_nearby_api(request):
+    lat, lng = _float_param(request, "lat"), _float_param(request, "lng")
+    if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({"error": "lat and lng are required"}, status=400)
+    try:
+        k = max(1, min(int(request.GET.get("k") or 10), NEARBY_MAX_RESULTS))
+    except ValueError:
+        k = 10
+
+    results = nearest_jobs(
+        lat, lng, k,
+        category=(request.GET.get("category") or "").strip() or None,
+        min_salary=_float_param(request, "min_salary"),
+        max_salary=_float_param(request, "max_salary"),
+    )
+    return JsonResponse({"results": [
+        {
+            "id": job["id"],
+            "title": job["title"],
+            "location": job["location"],
+            "category": job["category"],
+            "salary": job["salary"],
+            "lat": job["latitude"],
+            "lng": job["longitude"],
+            "distance_miles": job["distance_miles"],
+        }
+        for job in results
+    ]})
+
+# Location Map Page: Current GeoJSON snapshot URLs (full map plus one per category)
+def map_snapshot_manifest(request):
+    manifest = map_snapshots.current_manifest()
+    response = JsonResponse(manifest)
+    # short-lived: the manifest changes whenever jobs do, the files it points to never change
+    response["Cache-Control"] = "no-cache" if manifest["stale"] else "public, max-age=60"
+    return response
+
+ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
+
+# Location Map Page: Serve a snapshot file; names carry a content hash so they are immutable
+def map_snapshot_file(request, name):
+    snapshot = map_snapshots.open_snapshot(name)
+    if snapshot is None:
+        raise Http404("Unknown map snapshot")
+    if ACCEPTS_GZIP_RE.search(request.headers.get("Accept-Encoding", "")):
+        response = FileResponse(snapshot, content_type="application/geo+json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        # stored compressed; inflate on the fly for clients that cannot take gzip
+        response = FileResponse(gzip.GzipFile(fileobj=snapshot), content_type="application/geo+json")
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
 
 # map clustering functions
 
@@ -659,158 +929,67 @@ def applicant_map(request):
     }
     return render(request, 'home/applicant_map.html', {'template_data': template_data})
 
-@login_required
-def applicant_map_data_api(request):
-    if not request.user.profile.is_recruiter:
-        return JsonResponse({"error": "Unauthorized"}, status=403)
-    
+def _recruiter_applications(request):
+    # Applications to the recruiter's jobs, optionally narrowed with ?job_id=
+    applications = Application.objects.filter(job__user=request.user)
     job_id = request.GET.get('job_id')
-    
-    applicant_locations = OrderedDict()
-    
-    coords = {
-        # Major Metropolitan Areas
-        "New York City, NY": (40.7128, -74.0060),
-        "Los Angeles, CA": (34.0522, -118.2437),
-        "Chicago, IL": (41.8781, -87.6298),
-        "Houston, TX": (29.7604, -95.3698),
-        "Phoenix, AZ": (33.4484, -112.0740),
-        "Philadelphia, PA": (39.9526, -75.1652),
-        "San Antonio, TX": (29.4241, -98.4936),
-        "San Diego, CA": (32.7157, -117.1611),
-        "Dallas, TX": (32.7767, -96.7970),
-        "San Jose, CA": (37.3382, -121.8863),
-        
-        # Tech Hubs
-        "San Francisco, CA": (37.7749, -122.4194),
-        "Seattle, WA": (47.6062, -122.3321),
-        "Austin, TX": (30.2672, -97.7431),
-        "Boston, MA": (42.3601, -71.0589),
-        "Denver, CO": (39.7392, -104.9903),
-        "Portland, OR": (45.5152, -122.6784),
-        "Raleigh, NC": (35.7796, -78.6382),
-        "Nashville, TN": (36.1627, -86.7816),
-        
-        # Southeast
-        "Atlanta, GA": (33.7501, -84.3885),
-        "Miami, FL": (25.7617, -80.1918),
-        "Orlando, FL": (28.5383, -81.3792),
-        "Tampa, FL": (27.9506, -82.4572),
-        "Charlotte, NC": (35.2271, -80.8431),
-        "Jacksonville, FL": (30.3322, -81.6557),
-        "New Orleans, LA": (29.9511, -90.0715),
-        "Birmingham, AL": (33.5186, -86.8104),
-        
-        # Midwest
-        "Detroit, MI": (42.3314, -83.0458),
-        "Minneapolis, MN": (44.9778, -93.2650),
-        "Cleveland, OH": (41.4993, -81.6944),
-        "Indianapolis, IN": (39.7684, -86.1581),
-        "Columbus, OH": (39.9612, -82.9988),
-        "Milwaukee, WI": (43.0389, -87.9065),
-        "Kansas City, MO": (39.0997, -94.5786),
-        "St. Louis, MO": (38.6270, -90.1994),
-        "Cincinnati, OH": (39.1031, -84.5120),
-        
-        # Northeast
-        "Washington, DC": (38.9072, -77.0369),
-        "Baltimore, MD": (39.2904, -76.6122),
-        "Pittsburgh, PA": (40.4406, -79.9959),
-        "Buffalo, NY": (42.8864, -78.8784),
-        "Hartford, CT": (41.7658, -72.6734),
-        "Providence, RI": (41.8240, -71.4128),
-        "Albany, NY": (42.6526, -73.7562),
-        
-        # West Coast
-        "Sacramento, CA": (38.5816, -121.4944),
-        "Oakland, CA": (37.8044, -122.2712),
-        "Fresno, CA": (36.7378, -119.7871),
-        "Las Vegas, NV": (36.1699, -115.1398),
-        "Albuquerque, NM": (35.0844, -106.6504),
-        "Salt Lake City, UT": (40.7608, -111.8910),
-        "Boise, ID": (43.6150, -116.2023),
-        
-        # Mountain/Plains
-        "Colorado Springs, CO": (38.8339, -104.8214),
-        "Omaha, NE": (41.2565, -95.9345),
-        "Oklahoma City, OK": (35.4676, -97.5164),
-        "Tulsa, OK": (36.1540, -95.9928),
-        "Wichita, KS": (37.6872, -97.3301),
-        
-        # Additional Major Cities
-        "Richmond, VA": (37.5407, -77.4360),
-        "Norfolk, VA": (36.9148, -76.2587),
-        "Memphis, TN": (35.1495, -90.0490),
-        "Louisville, KY": (38.2527, -85.7585),
-        "Little Rock, AR": (34.7465, -92.2896),
-        "Jackson, MS": (32.2988, -90.1848),
-        "Mobile, AL": (30.6954, -88.0399),
-        "Savannah, GA": (32.0835, -81.0998),
-        
-        # Common Variations/Abbreviations
-        "NYC": (40.7128, -74.0060),
-        "LA": (34.0522, -118.2437),
-        "SF": (37.7749, -122.4194),
-        "DC": (38.9072, -77.0369),
-    }
-    
-    applications_query = Application.objects.filter(
-        job__user=request.user
-    ).select_related('applicant', 'applicant__profile', 'job')
-    
     if job_id and job_id != 'all':
         try:
-            job_id = int(job_id)
-            applications_query = applications_query.filter(job_id=job_id)
+            applications = applications.filter(job_id=int(job_id))
         except (ValueError, TypeError):
             pass
-    
-    applications = applications_query
-    
-    for app in applications:
-        profile = app.applicant.profile
-        loc = profile.location if hasattr(profile, 'location') else None
-        
-        if not loc or loc not in coords:
-            continue
-            
-        lat, lng = coords[loc]
-        
-        if loc not in applicant_locations:
-            applicant_locations[loc] = {
-                "location": loc,
-                "lat": lat,
-                "lng": lng,
-                "applicants": [],
-                "count": 0
-            }
-        
-        applicant_locations[loc]['applicants'].append({
+    return applications
+
+@login_required
+def applicant_map_data_api(request):
+    if not request.user.profile.is_recruiter:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+
+    # One GROUP BY over the coordinates stored at apply time; details load per location
+    rows = (
+        _recruiter_applications(request)
+        .filter(applicant_lat__isnull=False, applicant_lng__isnull=False)
+        .values("applicant_location", "applicant_lat", "applicant_lng")
+        .annotate(count=models.Count("id"))
+        .order_by("-count", "applicant_location")
+    )
+    return JsonResponse([
+        {
+            "location": row["applicant_location"],
+            "lat": row["applicant_lat"],
+            "lng": row["applicant_lng"],
+            "count": row["count"],
+        }
+        for row in rows
+    ], safe=False)
+
+APPLICANT_LOCATION_DETAIL_LIMIT = 200
+
+@login_required
+def applicant_map_location_api(request):
+    if not request.user.profile.is_recruiter:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+
+    location = request.GET.get('location', '')
+    applications = (
+        _recruiter_applications(request)
+        .filter(applicant_location=location, applicant_lat__isnull=False)
+        .select_related('applicant__profile', 'job')
+        .only(
+            'id', 'created_at', 'status', 'job__id', 'job__title', 'applicant__username',
+            'applicant__profile__firstName', 'applicant__profile__lastName',
+        )
+    )
+
+    applicants = []
+    for app in applications[:APPLICANT_LOCATION_DETAIL_LIMIT]:
+        profile = getattr(app.applicant, 'profile', None)
+        applicants.append({
             "id": app.id,
             "job_title": app.job.title,
             "job_id": app.job.id,
-            "applicant_name": f"{profile.firstName} {profile.lastName}" if hasattr(profile, 'firstName') and profile.firstName else app.applicant.username,
+            "applicant_name": f"{profile.firstName} {profile.lastName}" if profile is not None and profile.firstName else app.applicant.username,
             "applied_date": app.created_at.strftime("%b %d, %Y"),
             "status": app.status
         })
-        applicant_locations[loc]['count'] += 1
-    
-    return JsonResponse(list(applicant_locations.values()), safe=False)
-
-# Location Map Page: Convert city/address to latitude/longitude using Google Geocoding API
-def geocode_location(address):
-    if not address:
-        return None, None
-
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {"address": address, "key": settings.GOOGLE_MAPS_API_KEY}
-
-    response = requests.get(url, params=params).json()
-    print("Geocoding response for", address, ":", response)  # <-- add this
-
-    if response["status"] == "OK":
-        loc = response["results"][0]["geometry"]["location"]
-        return float(loc["lat"]), float(loc["lng"])
-    else:
-        print("Geocoding failed:", response["status"], response.get("error_message"))
-        return None, None
\ No newline at end of file
+    return JsonResponse({"location": location, "applicants": applicants})
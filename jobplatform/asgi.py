@@ -2,6 +2,9 @@
 ASGI config for jobplatform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to the server-sent-events stream (jobplatform/sse.py) are handled here
+directly so long-lived connections never occupy a Django request thread; everything
+else goes to the regular Django application.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +16,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobplatform.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from jobplatform.sse import EVENTS_PATH, event_stream  # noqa: E402  (needs settings loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        await event_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,169 @@
+"""
+In-process publish/subscribe used to push live updates (unread badge counts, new
+messages) to the server-sent-events stream in jobplatform/sse.py.
+
+Sync code (views, services, signals) can call publish() unconditionally, including
+under WSGI: with InProcessBroker nothing happens when nobody is subscribed, and
+RedisBroker logs rather than raises when Redis is unreachable. The broker class
+is chosen with settings.EVENTS_BROKER: InProcessBroker for a single process, or
+RedisBroker to fan out across processes and nodes. Any class with subscribe() and
+publish() will do.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    def __init__(self, broker, channel, loop):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def deliver(self, message):
+        # Called on the subscriber's event loop; a slow client drops its oldest events.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fans messages out to subscribers living in this process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            # publish() may run in a sync worker thread; hand off to the subscriber's loop
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # the subscriber's loop already shut down
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Fans messages out across processes and nodes through Redis pub/sub.
+
+    publish() goes to Redis; one listener thread per process receives every message
+    and hands it to this process's subscribers. Needs the optional ``redis`` package
+    and settings.EVENTS_REDIS_URL.
+    """
+
+    PREFIX = "events:"
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis  # optional dependency, only needed for multi-process deployments
+
+        self._redis = redis.Redis.from_url(url or settings.EVENTS_REDIS_URL)
+        self._redis_error = redis.RedisError
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        try:
+            self._redis.publish(self.PREFIX + channel, json.dumps(message))
+        except self._redis_error:
+            # live updates are best effort; the change itself is already saved
+            logger.exception("Could not publish event on %s", channel)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="events-redis", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        # Runs for the life of the process: a dropped connection is retried with
+        # exponential backoff instead of silently ending live updates.
+        delay = self.RECONNECT_MIN_SECONDS
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.PREFIX + "*")
+                delay = self.RECONNECT_MIN_SECONDS
+                for item in pubsub.listen():
+                    self._dispatch(item)
+            except self._redis_error:
+                logger.warning("Lost the Redis event subscription; reconnecting in %.1fs", delay, exc_info=True)
+            finally:
+                try:
+                    pubsub.close()
+                except self._redis_error:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    def _dispatch(self, item):
+        try:
+            channel = item["channel"].decode()[len(self.PREFIX):]
+            message = json.loads(item["data"])
+        except (KeyError, AttributeError, ValueError):
+            logger.warning("Ignoring malformed event %r", item)
+            return
+        super().publish(channel, message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            broker_path = getattr(settings, "EVENTS_BROKER", "jobplatform.events.InProcessBroker")
+            _broker = import_string(broker_path)()
+        return _broker
+
+def publish(channel, event, data):
+    get_broker().publish(channel, {"event": event, "data": data})
+
+def publish_to_user(user_id, event, data):
+    publish(user_channel(user_id), event, data)
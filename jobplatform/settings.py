@@ -88,6 +88,27 @@ DATABASES = {
 }
 
 
+# Caches
+# "search" holds job-search result pages (home/services/search_cache.py). LocMemCache
+# evicts least-recently-used entries past MAX_ENTRIES; set SEARCH_CACHE_BACKEND to
+# django.core.cache.backends.filebased.FileBasedCache (with SEARCH_CACHE_LOCATION) to
+# share it between worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': config('SEARCH_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('SEARCH_CACHE_LOCATION', default='job-search'),
+        'TIMEOUT': config('SEARCH_CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SEARCH_CACHE_MAX_ENTRIES', default=5000, cast=int),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -134,5 +155,47 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# "map_snapshots" holds the gzip GeoJSON job map snapshots (home/services/map_snapshots.py).
+# File names carry a content hash, so whatever serves MAP_SNAPSHOT_URL can cache them forever.
+MAP_SNAPSHOT_URL = '/map/snapshots/'
+# Rebuild snapshots on a background thread shortly after jobs change. Set to False to
+# rebuild only through `manage.py build_map_snapshots` (e.g. from cron).
+MAP_SNAPSHOT_ASYNC = config('MAP_SNAPSHOT_ASYNC', default=True, cast=bool)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'map_snapshots': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': os.path.join(MEDIA_ROOT, 'map-snapshots'),
+            'base_url': MAP_SNAPSHOT_URL,
+        },
+    },
+}
+
 #add from google maps api key
 GOOGLE_MAPS_API_KEY = config('GOOGLE_API_KEY')
+
+# Geocoder backend (home/services/geocoders.py). Use
+# home.services.geocoders.GazetteerGeocoder for offline/air-gapped setups, or
+# home.services.geocoders.FixtureGeocoder with GEOCODER_OPTIONS={"path": ...} to replay
+# recorded answers in tests and benchmarks.
+GEOCODER_BACKEND = config('GEOCODER_BACKEND', default='home.services.geocoders.GoogleGeocoder')
+GEOCODER_OPTIONS = {}
+# Geocode job locations on a background thread after the save commits, so create/edit
+# never wait on the provider. Set to False to geocode inline at commit time.
+GEOCODE_ASYNC = config('GEOCODE_ASYNC', default=True, cast=bool)
+
+# Email (saved-search digests). Defaults to the console backend so nothing leaves
+# the machine; use django.core.mail.backends.filebased.EmailBackend with
+# EMAIL_FILE_PATH to keep digests on disk.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-reply@gtjobfinder.local')
+
+# Live updates pushed over the server-sent-events stream (jobplatform/sse.py, ASGI only).
+# The in-process broker only reaches clients connected to the same process; set
+# jobplatform.events.RedisBroker when running several; it is only usable once the optional
+# redis package (commented in requirements.txt) is installed.
+EVENTS_BROKER = config('EVENTS_BROKER', default='jobplatform.events.InProcessBroker')
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default='redis://localhost:6379/0')
@@ -0,0 +1,100 @@
+"""
+Server-sent-events stream mounted by jobplatform/asgi.py at EVENTS_PATH.
+
+Each authenticated connection subscribes to its user's channel on the events broker
+and receives named events (``saved_search_unread``, ``message``, ``message_read``) as they are
+published, plus a comment heartbeat so proxies keep the connection open. Pages fall
+back to polling when the stream is unavailable (e.g. when served over WSGI).
+"""
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from jobplatform.events import get_broker, user_channel
+
+EVENTS_PATH = "/events/stream/"
+HEARTBEAT_SECONDS = 25
+
+
+def _session_key(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+            morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+            return morsel.value if morsel else None
+    return None
+
+@sync_to_async
+def _authenticate(session_key):
+    from django.contrib.auth import get_user
+
+    engine = import_module(settings.SESSION_ENGINE)
+    user = get_user(SimpleNamespace(session=engine.SessionStore(session_key)))
+    return user if user.is_authenticated else None
+
+@sync_to_async
+def _initial_events(user):
+    from home.services.notifications import unread_count
+
+    events = []
+    if getattr(getattr(user, "profile", None), "is_recruiter", False):
+        events.append({"event": "saved_search_unread", "data": {"count": unread_count(user.pk)}})
+    return events
+
+def _encode(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n".encode()
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def event_stream(scope, receive, send):
+    session_key = _session_key(scope)
+    user = await _authenticate(session_key) if session_key else None
+    if user is None:
+        await send({"type": "http.response.start", "status": 403,
+                    "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"Forbidden"})
+        return
+
+    subscription = get_broker().subscribe(user_channel(user.pk))
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        for message in await _initial_events(user):
+            await send({"type": "http.response.body", "body": _encode(message), "more_body": True})
+
+        while not disconnected.done():
+            next_message = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected},
+                timeout=HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_message in done:
+                body = _encode(next_message.result())
+            else:
+                next_message.cancel()
+                if disconnected.done():
+                    break
+                body = b": ping\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        subscription.close()
+        disconnected.cancel()
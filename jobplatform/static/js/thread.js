@@ -0,0 +1,148 @@
+// Message threads: older history on demand, live delivery and read receipts.
+//
+// The list element carries data-history-url (JSON endpoint), data-older (cursor of
+// the next older page, empty when there is none), data-thread (key matched against
+// live events), data-read-url and data-me. New rows are cloned from the
+// <template data-message-template> on the page and filled through data-field hooks.
+// Live "message"/"message_read" events arrive from the stream opened in base.html.
+(function () {
+  function renderMessage(template, message) {
+    const row = template.content.firstElementChild.cloneNode(true);
+    row.dataset.messageId = message.id;
+    row.dataset.sender = message.sender;
+    row.querySelector('[data-field="sender"]').textContent = message.sender;
+    row.querySelector('[data-field="created"]').textContent = message.created_display;
+    const body = row.querySelector('[data-field="body"]');
+    message.body.split("\n").forEach((line, i) => {
+      if (i > 0) body.appendChild(document.createElement("br"));
+      body.appendChild(document.createTextNode(line));
+    });
+    return row;
+  }
+
+  function csrfToken(form) {
+    const input = form && form.querySelector('input[name="csrfmiddlewaretoken"]');
+    return input ? input.value : "";
+  }
+
+  document.querySelectorAll("[data-history-url]").forEach((list) => {
+    const button = document.querySelector(`[data-load-older="${list.id}"]`);
+    const template = document.querySelector(`template[data-message-template="${list.id}"]`);
+    const form = document.querySelector(`form[data-thread-form="${list.id}"]`);
+    if (!template) return;
+
+    const seen = document.createElement("li");
+    seen.className = "text-muted small text-end";
+    seen.style.listStyle = "none";
+    seen.textContent = "Seen";
+    seen.hidden = true;
+
+    const sync = () => { if (button) button.hidden = !list.dataset.older; };
+    sync();
+
+    function hasMessage(id) {
+      return list.querySelector(`[data-message-id="${id}"]`) !== null;
+    }
+
+    function append(message) {
+      if (hasMessage(message.id)) return;
+      const empty = list.querySelector("[data-empty]");
+      if (empty) empty.remove();
+      list.appendChild(renderMessage(template, message));
+    }
+
+    function showSeen(through) {
+      // "Seen" goes under the newest of my messages the other side has read
+      const mine = Array.from(list.querySelectorAll("[data-message-id]"))
+        .filter((row) => row.dataset.sender === list.dataset.me && Number(row.dataset.messageId) <= through);
+      const last = mine[mine.length - 1];
+      if (!last) return;
+      last.after(seen);
+      seen.hidden = false;
+    }
+
+    function markRead() {
+      if (!list.dataset.readUrl || document.hidden) return;
+      fetch(list.dataset.readUrl, {
+        method: "POST",
+        headers: { "X-CSRFToken": csrfToken(form), Accept: "application/json" },
+        credentials: "same-origin",
+      }).catch(() => {});
+    }
+
+    if (button) {
+      button.addEventListener("click", () => {
+        const url = `${list.dataset.historyUrl}?before=${encodeURIComponent(list.dataset.older)}`;
+        button.disabled = true;
+        fetch(url, { headers: { Accept: "application/json" } })
+          .then((r) => (r.ok ? r.json() : Promise.reject(r.status)))
+          .then((data) => {
+            const anchor = list.firstElementChild;
+            data.messages.forEach((m) => list.insertBefore(renderMessage(template, m), anchor));
+            list.dataset.older = data.older || "";
+            sync();
+          })
+          .catch(() => {})
+          .finally(() => { button.disabled = false; });
+      });
+    }
+
+    if (list.dataset.seenThrough) showSeen(Number(list.dataset.seenThrough));
+
+    document.addEventListener("live-message", (e) => {
+      const message = e.detail;
+      if (message.thread !== list.dataset.thread) return;
+      append(message);
+      if (message.sender !== list.dataset.me) markRead();
+    });
+
+    document.addEventListener("live-message-read", (e) => {
+      if (e.detail.thread === list.dataset.thread) showSeen(e.detail.through);
+    });
+
+    document.addEventListener("visibilitychange", () => {
+      if (!document.hidden) markRead();
+    });
+
+    if (form) {
+      const error = document.createElement("p");
+      error.className = "text-danger small";
+      error.hidden = true;
+      form.prepend(error);
+
+      // Send without a page reload; the plain POST + redirect still works without JS
+      form.addEventListener("submit", (e) => {
+        e.preventDefault();
+        const submit = form.querySelector('[type="submit"]');
+        submit.disabled = true;
+        error.hidden = true;
+        let answered = false;
+        fetch(form.action, {
+          method: "POST",
+          body: new FormData(form),
+          headers: { Accept: "application/json" },
+          credentials: "same-origin",
+        })
+          .then((r) => {
+            answered = true;
+            return r.ok ? r.json() : Promise.reject(r.status);
+          })
+          .then((data) => {
+            if (data.message) append(data.message);
+            form.reset();
+          })
+          .catch(() => {
+            // only a request that never got an answer falls back to a plain POST; once the
+            // server has answered, resending could post the message twice
+            if (!answered) {
+              form.submit();
+              return;
+            }
+            error.textContent = "Your message could not be sent. Reload the page and try again.";
+            error.hidden = false;
+          })
+          .finally(() => { submit.disabled = false; });
+      });
+    }
+  });
+})();
@@ -0,0 +1,51 @@
+// Attaches autocomplete suggestions to inputs marked with data-typeahead-field
+// (or data-typeahead-field-from="<id of a select holding the field>").
+(function () {
+  const endpoint = document.body.dataset.typeaheadUrl;
+  if (!endpoint) return;
+
+  function attach(input) {
+    const list = document.createElement("datalist");
+    list.id = input.id + "-suggestions";
+    input.setAttribute("list", list.id);
+    input.setAttribute("autocomplete", "off");
+    input.after(list);
+
+    let timer = null;
+    let controller = null;
+
+    function currentField() {
+      const from = input.dataset.typeaheadFieldFrom;
+      return from ? document.getElementById(from).value : input.dataset.typeaheadField;
+    }
+
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      const q = input.value.trim();
+      if (!q) { list.innerHTML = ""; return; }
+      timer = setTimeout(async () => {
+        if (controller) controller.abort();
+        controller = new AbortController();
+        try {
+          const params = new URLSearchParams({ field: currentField(), q: q });
+          const res = await fetch(endpoint + "?" + params, {
+            credentials: "same-origin",
+            signal: controller.signal,
+          });
+          if (!res.ok) return;
+          const data = await res.json();
+          list.innerHTML = "";
+          for (const s of data.suggestions) {
+            const opt = document.createElement("option");
+            opt.value = s.value;
+            list.appendChild(opt);
+          }
+        } catch (e) {
+          if (e.name !== "AbortError") console.error("Typeahead failed", e);
+        }
+      }, 120);
+    });
+  }
+
+  document.querySelectorAll("[data-typeahead-field], [data-typeahead-field-from]").forEach(attach);
+})();
@@ -0,0 +1,58 @@
+import sys
+import types
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from jobplatform.events import InProcessBroker, RedisBroker
+
+
+class RedisBrokerTests(SimpleTestCase):
+    # redis is an optional dependency (see requirements.txt); a fake module stands in
+    # for it so these tests run whether or not it is installed
+    def test_redis_broker_survives_redis_errors(self):
+        class RedisError(Exception):
+            pass
+
+        class Stop(Exception):
+            pass
+
+        class FakePubSub:
+            def __init__(self, items):
+                self.items = items
+
+            def psubscribe(self, pattern):
+                pass
+
+            def listen(self):
+                for item in self.items:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+
+            def close(self):
+                pass
+
+        # first connection drops, the second delivers a message, then the test stops the loop
+        sessions = [
+            FakePubSub([RedisError("connection reset")]),
+            FakePubSub([{"channel": b"events:user:1", "data": b'{"event": "message"}'}, Stop()]),
+        ]
+        client = mock.Mock()
+        client.publish.side_effect = RedisError("down")
+        client.pubsub.side_effect = lambda **kwargs: sessions.pop(0)
+        fake_redis = types.SimpleNamespace(
+            RedisError=RedisError, Redis=mock.Mock(from_url=mock.Mock(return_value=client))
+        )
+
+        with mock.patch.dict(sys.modules, {"redis": fake_redis}):
+            broker = RedisBroker("redis://fake")
+        with self.assertLogs("jobplatform.events", "ERROR"):
+            broker.publish("user:1", {"event": "message"})
+
+        with mock.patch("jobplatform.events.time.sleep") as sleep, \
+                mock.patch.object(InProcessBroker, "publish") as deliver, \
+                self.assertLogs("jobplatform.events", "WARNING"), self.assertRaises(Stop):
+            broker._listen()
+        deliver.assert_called_once_with("user:1", {"event": "message"})
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [RedisBroker.RECONNECT_MIN_SECONDS])
@@ -1,24 +1,37 @@
 from django.contrib import admin
 from .models import Conversation, Message, DirectConversation, DirectMessage
+from . import search
+
+
+class BodySearchMixin:
+    """Match message bodies through the full-text index instead of a LIKE scan."""
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term and search.available():
+            results |= queryset.filter(pk__in=search.matching_ids(self.model, search_term))
+        elif search_term:
+            results |= queryset.filter(body__icontains=search_term)
+        return results, may_have_duplicates
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
-    list_display = ("id", "application", "created_at")
+    list_display = ("id", "application", "created_at", "recruiter_last_read_id", "applicant_last_read_id")
     search_fields = ("application__job__title", "application__applicant__username")
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
-    list_display = ("id", "conversation", "sender", "created_at", "read_at")
-    list_filter = ("read_at", "created_at")
-    search_fields = ("body", "sender__username")
+class MessageAdmin(BodySearchMixin, admin.ModelAdmin):
+    list_display = ("id", "conversation", "sender", "created_at")
+    list_filter = ("created_at",)
+    search_fields = ("sender__username",)
 
 @admin.register(DirectConversation)
 class DirectConversationAdmin(admin.ModelAdmin):
-    list_display = ("id", "user_one", "user_two", "created_at")
+    list_display = ("id", "user_one", "user_two", "created_at", "user_one_last_read_id", "user_two_last_read_id")
     search_fields = ("user_one__username", "user_two__username")
 
 @admin.register(DirectMessage)
-class DirectMessageAdmin(admin.ModelAdmin):
-    list_display = ("id", "conversation", "sender", "created_at", "read_at")
-    list_filter = ("created_at", "read_at")
-    search_fields = ("sender__username", "conversation__user_one__username", "conversation__user_two__username", "body")
\ No newline at end of file
+class DirectMessageAdmin(BodySearchMixin, admin.ModelAdmin):
+    list_display = ("id", "conversation", "sender", "created_at")
+    list_filter = ("created_at",)
+    search_fields = ("sender__username", "conversation__user_one__username", "conversation__user_two__username")
\ No newline at end of file
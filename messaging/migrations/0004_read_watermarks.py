@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:25
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def _read_through(messages, **filters):
+    # newest message of the other side that had been marked read
+    return Coalesce(models.Subquery(
+        messages.filter(conversation=models.OuterRef('pk'), read_at__isnull=False, **filters)
+        .order_by('-id').values('id')[:1]
+    ), 0)
+
+
+def fill_watermarks(apps, schema_editor):
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    DirectConversation = apps.get_model('messaging', 'DirectConversation')
+    DirectMessage = apps.get_model('messaging', 'DirectMessage')
+
+    applicant = models.F('conversation__application__applicant_id')
+    Conversation.objects.update(
+        recruiter_last_read_id=_read_through(Message.objects.filter(sender_id=applicant)),
+        applicant_last_read_id=_read_through(Message.objects.exclude(sender_id=applicant)),
+    )
+    DirectConversation.objects.update(
+        user_one_last_read_id=_read_through(DirectMessage.objects.filter(sender_id=models.F('conversation__user_two_id'))),
+        user_two_last_read_id=_read_through(DirectMessage.objects.filter(sender_id=models.F('conversation__user_one_id'))),
+    )
+
+
+def fill_read_at(apps, schema_editor):
+    # The read times are gone; mark everything at or below each reader's watermark
+    # as read when it was sent, so history does not come back unread.
+    Message = apps.get_model('messaging', 'Message')
+    DirectMessage = apps.get_model('messaging', 'DirectMessage')
+
+    applicant = models.F('conversation__application__applicant_id')
+    Message.objects.filter(
+        sender_id=applicant, id__lte=models.F('conversation__recruiter_last_read_id')
+    ).update(read_at=models.F('created_at'))
+    Message.objects.exclude(sender_id=applicant).filter(
+        id__lte=models.F('conversation__applicant_last_read_id')
+    ).update(read_at=models.F('created_at'))
+    DirectMessage.objects.filter(
+        sender_id=models.F('conversation__user_two_id'), id__lte=models.F('conversation__user_one_last_read_id')
+    ).update(read_at=models.F('created_at'))
+    DirectMessage.objects.filter(
+        sender_id=models.F('conversation__user_one_id'), id__lte=models.F('conversation__user_two_last_read_id')
+    ).update(read_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_message_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='applicant_last_read_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='recruiter_last_read_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='directconversation',
+            name='user_one_last_read_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='directconversation',
+            name='user_two_last_read_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_watermarks, fill_read_at),
+        migrations.RemoveField(
+            model_name='directmessage',
+            name='read_at',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_at',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_direct_conversations(apps, schema_editor):
+    DirectConversation = apps.get_model('messaging', 'DirectConversation')
+    DirectMessage = apps.get_model('messaging', 'DirectMessage')
+
+    # threads opened by merely viewing a profile
+    DirectConversation.objects.filter(messages__isnull=True).delete()
+
+    keep = {}
+    for conv in DirectConversation.objects.order_by('id'):
+        if conv.user_one_id > conv.user_two_id:
+            conv.user_one_id, conv.user_two_id = conv.user_two_id, conv.user_one_id
+            conv.user_one_last_read_id, conv.user_two_last_read_id = (
+                conv.user_two_last_read_id, conv.user_one_last_read_id
+            )
+        pair = (conv.user_one_id, conv.user_two_id)
+        survivor = keep.setdefault(pair, conv)
+        if survivor is not conv:
+            # duplicate thread: move its messages onto the oldest row for the pair
+            DirectMessage.objects.filter(conversation=conv).update(conversation=survivor)
+            survivor.user_one_last_read_id = max(survivor.user_one_last_read_id, conv.user_one_last_read_id)
+            survivor.user_two_last_read_id = max(survivor.user_two_last_read_id, conv.user_two_last_read_id)
+            conv.delete()
+    for conv in keep.values():
+        conv.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_read_watermarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_direct_conversations, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='directconversation',
+            name='messaging_d_user_on_7760e6_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='directconversation',
+            constraint=models.UniqueConstraint(fields=('user_one', 'user_two'), name='messaging_direct_unique_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='directconversation',
+            constraint=models.CheckConstraint(condition=models.Q(('user_one__lte', models.F('user_two'))), name='messaging_direct_canonical_pair'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.db import migrations
+
+# FTS5 index behind messaging/search.py. rowid = message id * 2 for application
+# messages and direct message id * 2 + 1 for direct messages; "participants" holds
+# "u<id> u<id>" for scoping a search to one user's conversations.
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE messaging_message_fts USING fts5(
+        body, participants, tokenize = 'porter unicode61'
+    )""",
+    """CREATE TRIGGER messaging_message_fts_insert AFTER INSERT ON messaging_message BEGIN
+        INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT new.id * 2, new.body, 'u' || a.applicant_id || ' u' || j.user_id
+        FROM messaging_conversation c
+        JOIN home_application a ON a.id = c.application_id
+        JOIN home_job j ON j.id = a.job_id
+        WHERE c.id = new.conversation_id;
+    END""",
+    """CREATE TRIGGER messaging_message_fts_update AFTER UPDATE OF body, conversation_id ON messaging_message BEGIN
+        DELETE FROM messaging_message_fts WHERE rowid = old.id * 2;
+        INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT new.id * 2, new.body, 'u' || a.applicant_id || ' u' || j.user_id
+        FROM messaging_conversation c
+        JOIN home_application a ON a.id = c.application_id
+        JOIN home_job j ON j.id = a.job_id
+        WHERE c.id = new.conversation_id;
+    END""",
+    """CREATE TRIGGER messaging_message_fts_delete AFTER DELETE ON messaging_message BEGIN
+        DELETE FROM messaging_message_fts WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER messaging_directmessage_fts_insert AFTER INSERT ON messaging_directmessage BEGIN
+        INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT new.id * 2 + 1, new.body, 'u' || c.user_one_id || ' u' || c.user_two_id
+        FROM messaging_directconversation c
+        WHERE c.id = new.conversation_id;
+    END""",
+    """CREATE TRIGGER messaging_directmessage_fts_update AFTER UPDATE OF body, conversation_id ON messaging_directmessage BEGIN
+        DELETE FROM messaging_message_fts WHERE rowid = old.id * 2 + 1;
+        INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT new.id * 2 + 1, new.body, 'u' || c.user_one_id || ' u' || c.user_two_id
+        FROM messaging_directconversation c
+        WHERE c.id = new.conversation_id;
+    END""",
+    """CREATE TRIGGER messaging_directmessage_fts_delete AFTER DELETE ON messaging_directmessage BEGIN
+        DELETE FROM messaging_message_fts WHERE rowid = old.id * 2 + 1;
+    END""",
+    # index the existing history
+    """INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT m.id * 2, m.body, 'u' || a.applicant_id || ' u' || j.user_id
+        FROM messaging_message m
+        JOIN messaging_conversation c ON c.id = m.conversation_id
+        JOIN home_application a ON a.id = c.application_id
+        JOIN home_job j ON j.id = a.job_id""",
+    """INSERT INTO messaging_message_fts (rowid, body, participants)
+        SELECT m.id * 2 + 1, m.body, 'u' || c.user_one_id || ' u' || c.user_two_id
+        FROM messaging_directmessage m
+        JOIN messaging_directconversation c ON c.id = m.conversation_id""",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS messaging_message_fts_insert',
+    'DROP TRIGGER IF EXISTS messaging_message_fts_update',
+    'DROP TRIGGER IF EXISTS messaging_message_fts_delete',
+    'DROP TRIGGER IF EXISTS messaging_directmessage_fts_insert',
+    'DROP TRIGGER IF EXISTS messaging_directmessage_fts_update',
+    'DROP TRIGGER IF EXISTS messaging_directmessage_fts_delete',
+    'DROP TABLE IF EXISTS messaging_message_fts',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite-only; elsewhere messaging/search.py falls back to LIKE
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_direct_conversation_unique_pair'),
+        ('home', '0006_application'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
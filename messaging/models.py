@@ -1,17 +1,34 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils import timezone
 from home.models import Application
 
+def advance_watermark(model, pk, field, message_id) -> bool:
+    """Move a read watermark forward to message_id; one conditional row update."""
+    return model.objects.filter(pk=pk, **{f"{field}__lt": message_id}).update(**{field: message_id}) > 0
+
+
 class Conversation(models.Model):
     application = models.OneToOneField(
         Application, on_delete=models.CASCADE, related_name="conversation"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # read watermarks: id of the newest message each side has read (0 = nothing yet)
+    recruiter_last_read_id = models.PositiveBigIntegerField(default=0)
+    applicant_last_read_id = models.PositiveBigIntegerField(default=0)
 
     def participants(self):
         return [self.application.job.user, self.application.applicant]
 
+    def last_read_field(self, user):
+        return "applicant_last_read_id" if user.id == self.application.applicant_id else "recruiter_last_read_id"
+
+    def other_last_read_id(self, user):
+        """How far the other participant has read."""
+        return self.recruiter_last_read_id if user.id == self.application.applicant_id else self.applicant_last_read_id
+
+    def mark_read_through(self, user, message_id) -> bool:
+        return advance_watermark(Conversation, self.pk, self.last_read_field(user), message_id)
+
     def __str__(self):
         a = self.application
         return f"Conversation: {a.applicant.username} ↔ {a.job.title}"
@@ -23,30 +40,44 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     body = models.TextField(max_length=2000)
     created_at = models.DateTimeField(auto_now_add=True)
-    read_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["created_at"]
-
-    def mark_read(self):
-        if not self.read_at:
-            self.read_at = timezone.now()
-            self.save(update_fields=["read_at"])
+        indexes = [
+            # keyset pagination of a thread's history on (created_at, id)
+            models.Index(fields=["conversation", "created_at"]),
+        ]
 
 class DirectConversation(models.Model):
     user_one = models.ForeignKey(User, on_delete=models.CASCADE, related_name="direct_as_one")
     user_two = models.ForeignKey(User, on_delete=models.CASCADE, related_name="direct_as_two")
     created_at = models.DateTimeField(auto_now_add=True)
+    # read watermarks: id of the newest message each side has read (0 = nothing yet)
+    user_one_last_read_id = models.PositiveBigIntegerField(default=0)
+    user_two_last_read_id = models.PositiveBigIntegerField(default=0)
 
     class Meta:
-        indexes = [
-            models.Index(fields=["user_one", "user_two"]),
+        # one row per pair, stored canonically with the smaller user id as user_one
+        constraints = [
+            models.UniqueConstraint(fields=["user_one", "user_two"], name="messaging_direct_unique_pair"),
+            models.CheckConstraint(
+                condition=models.Q(user_one__lte=models.F("user_two")), name="messaging_direct_canonical_pair"
+            ),
         ]
-        # we’ll canonicalize ordering (smaller id = user_one) to avoid duplicates
 
     def participants(self):
         return [self.user_one, self.user_two]
 
+    def last_read_field(self, user):
+        return "user_one_last_read_id" if user.id == self.user_one_id else "user_two_last_read_id"
+
+    def other_last_read_id(self, user):
+        """How far the other participant has read."""
+        return self.user_two_last_read_id if user.id == self.user_one_id else self.user_one_last_read_id
+
+    def mark_read_through(self, user, message_id) -> bool:
+        return advance_watermark(DirectConversation, self.pk, self.last_read_field(user), message_id)
+
     def __str__(self):
         return f"Direct: {self.user_one.username} ↔ {self.user_two.username}"
 
@@ -55,12 +86,10 @@ class DirectMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     body = models.TextField(max_length=2000)
     created_at = models.DateTimeField(auto_now_add=True)
-    read_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["created_at"]
-
-    def mark_read(self):
-        if not self.read_at:
-            self.read_at = timezone.now()
-            self.save(update_fields=["read_at"])
+        indexes = [
+            # keyset pagination of a thread's history on (created_at, id)
+            models.Index(fields=["conversation", "created_at"]),
+        ]
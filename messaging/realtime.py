@@ -0,0 +1,44 @@
+from django.utils import timezone
+
+from jobplatform.events import publish_to_user
+
+# Live delivery for both kinds of thread over the user event stream (jobplatform/sse.py).
+# Every participant gets "message" events, the sender included so their other tabs
+# stay in sync, and "message_read" events when someone catches up on a thread. Pages
+# match events to the open thread by its key: "app:<application id>" or
+# "direct:<smaller user id>-<larger user id>".
+
+
+def application_thread_key(application_id):
+    return f"app:{application_id}"
+
+def direct_thread_key(user_one_id, user_two_id):
+    # keyed by the canonical pair so a page can listen before the conversation exists
+    return f"direct:{min(user_one_id, user_two_id)}-{max(user_one_id, user_two_id)}"
+
+def message_payload(message, thread_key, kind, **extra):
+    return {
+        "thread": thread_key,
+        "kind": kind,
+        "id": message.id,
+        "sender": message.sender.username,
+        "body": message.body,
+        "preview": message.body[:120],
+        "created_at": message.created_at.isoformat(),
+        "created_display": timezone.localtime(message.created_at).strftime("%Y-%m-%d %H:%M"),
+        **extra,
+    }
+
+def publish_message(participants, payload):
+    for user in participants:
+        publish_to_user(user.id, "message", payload)
+
+def publish_read(participants, reader, thread_key, through_id):
+    """Tell the other participants that `reader` has read everything up to `through_id`."""
+    for user in participants:
+        if user.id != reader.id:
+            publish_to_user(user.id, "message_read", {
+                "thread": thread_key,
+                "reader": reader.username,
+                "through": through_id,
+            })
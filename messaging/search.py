@@ -0,0 +1,136 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import DirectMessage, Message
+
+# Full-text search over both kinds of message. On SQLite the bodies live in one FTS5
+# table (messaging/migrations/0006_message_search_index.py) kept current by triggers,
+# so bulk_create, updates and cascading deletes are all covered. Each row carries a
+# "participants" column ("u<id> u<id>") so a user's search is scoped inside the index
+# itself, and its rowid encodes the source row: message id * 2 for application
+# messages, direct message id * 2 + 1 for direct ones. Other databases fall back to a
+# LIKE scan over the user's conversations.
+FTS_TABLE = "messaging_message_fts"
+SEARCH_PAGE_SIZE = 20
+SNIPPET_TOKENS = 12
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_TERMS = re.compile(r"\w+")
+
+APPLICATION, DIRECT = "application", "direct"
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+def fts_query(text):
+    """Quote each word of free text as a prefix term: 'pyth dev' -> '"pyth"* "dev"*'."""
+    return " ".join(f'"{term}"*' for term in _TERMS.findall((text or "").lower())[:20])
+
+def _split_rowid(rowid):
+    return (DIRECT if rowid % 2 else APPLICATION), rowid // 2
+
+def _highlight(snippet):
+    return escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+def _ranked_rows(match, limit, offset):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, 1.0, 0.0) LIMIT %s OFFSET %s",
+            [_MARK_OPEN, _MARK_CLOSE, SNIPPET_TOKENS, match, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def _load(hits):
+    """Fetch the message rows behind (kind, id) hits, keyed the same way."""
+    ids = {APPLICATION: [], DIRECT: []}
+    for kind, message_id in hits:
+        ids[kind].append(message_id)
+    loaded = {}
+    if ids[APPLICATION]:
+        messages = Message.objects.filter(id__in=ids[APPLICATION]).select_related(
+            "sender", "conversation__application__job__user", "conversation__application__applicant"
+        )
+        loaded.update(((APPLICATION, m.id), m) for m in messages)
+    if ids[DIRECT]:
+        messages = DirectMessage.objects.filter(id__in=ids[DIRECT]).select_related(
+            "sender", "conversation__user_one", "conversation__user_two"
+        )
+        loaded.update(((DIRECT, m.id), m) for m in messages)
+    return loaded
+
+def _fallback_hits(user, text, limit, offset):
+    # Newest first; no ranking without the index
+    terms = _TERMS.findall(text or "")
+    if not terms:
+        return []
+    body = Q()
+    for term in terms:
+        body &= Q(body__icontains=term)
+    app_ids = Message.objects.filter(body).filter(
+        Q(conversation__application__applicant=user) | Q(conversation__application__job__user=user)
+    ).order_by("-created_at", "-id").values_list("created_at", "id")
+    direct_ids = DirectMessage.objects.filter(body).filter(
+        Q(conversation__user_one=user) | Q(conversation__user_two=user)
+    ).order_by("-created_at", "-id").values_list("created_at", "id")
+    newest = sorted(
+        [(at, APPLICATION, pk) for at, pk in app_ids[:offset + limit]]
+        + [(at, DIRECT, pk) for at, pk in direct_ids[:offset + limit]],
+        reverse=True,
+    )
+    return [(kind, pk, None) for _, kind, pk in newest[offset:offset + limit]]
+
+
+def search_messages(user, text, page=1, page_size=None):
+    """
+    One page of the user's messages matching ``text``, best match first.
+    Returns (results, has_more); each result is {"kind", "message", "snippet"} where
+    snippet is escaped HTML with the matched words in <mark>.
+    """
+    page_size = page_size or SEARCH_PAGE_SIZE
+    offset = (max(page, 1) - 1) * page_size
+    if available():
+        query = fts_query(text)
+        if not query:
+            return [], False
+        match = f'body : ({query}) AND participants : "u{user.id}"'
+        hits = [(*_split_rowid(rowid), _highlight(snippet)) for rowid, snippet in
+                _ranked_rows(match, page_size + 1, offset)]
+    else:
+        hits = _fallback_hits(user, text, page_size + 1, offset)
+
+    has_more = len(hits) > page_size
+    hits = hits[:page_size]
+    loaded = _load((kind, pk) for kind, pk, _ in hits)
+    results = []
+    for kind, pk, snippet in hits:
+        message = loaded.get((kind, pk))
+        if message is not None:
+            results.append({
+                "kind": kind,
+                "message": message,
+                "snippet": snippet if snippet is not None else escape(message.body[:200]),
+            })
+    return results, has_more
+
+
+def matching_ids(model, text):
+    """
+    Subquery of the ids of ``model`` rows whose body matches ``text``, for the admin
+    changelists: ``queryset.filter(pk__in=matching_ids(...))``. It runs inside the
+    changelist query, so every match is found however many there are, and the
+    changelist's own pagination applies.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    parity = 1 if model is DirectMessage else 0
+    return RawSQL(
+        f"SELECT rowid / 2 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid %% 2 = %s",
+        [f"body : ({query})", parity],
+    )
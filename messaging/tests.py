@@ -1,3 +1,188 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from home.models import Application, Job
+from . import search
+from .models import Conversation, DirectConversation, DirectMessage, Message
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user(username="rita", password="pw")
+        self.candidate = User.objects.create_user(username="cam", password="pw")
+        self.job = Job.objects.create(user=self.recruiter, title="Backend Dev")
+
+    def _thread(self, n):
+        applicant = User.objects.create_user(username=f"applicant{n}", password="pw")
+        app = Application.objects.create(job=self.job, applicant=applicant)
+        conv = Conversation.objects.create(application=app)
+        Message.objects.create(conversation=conv, sender=applicant, body=f"hello {n}")
+        return conv
+
+    def test_inbox_queries_do_not_grow_with_threads(self):
+        self.client.force_login(self.recruiter)
+        self._thread(0)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("messaging:inbox"))
+        for n in range(1, 6):
+            self._thread(n)
+        direct = DirectConversation.objects.create(user_one=self.recruiter, user_two=self.candidate)
+        DirectMessage.objects.create(conversation=direct, sender=self.candidate, body="newest")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("messaging:inbox"))
+        self.assertEqual(len(many), len(few))
+
+        threads = response.context["threads"]
+        self.assertEqual(len(threads), 7)
+        self.assertEqual((threads[0]["kind"], threads[0]["conv"].last_body), ("direct", "newest"))
+        self.assertEqual(response.context["unread_total"], 7)
+
+
+class MessageHistoryTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user(username="rita", password="pw")
+        self.candidate = User.objects.create_user(username="cam", password="pw")
+        job = Job.objects.create(user=self.recruiter, title="Backend Dev")
+        self.app = Application.objects.create(job=job, applicant=self.candidate)
+        conv = Conversation.objects.create(application=self.app)
+        Message.objects.bulk_create([
+            Message(conversation=conv, sender=self.candidate, body=f"message {i}") for i in range(7)
+        ])
+
+    def test_thread_opens_on_latest_page_and_pages_back(self):
+        self.client.force_login(self.recruiter)
+        with mock.patch("messaging.views.MESSAGE_PAGE_SIZE", 3):
+            response = self.client.get(reverse("messaging:conversation_detail", args=[self.app.id]))
+            self.assertEqual([m.body for m in response.context["thread_messages"]],
+                             ["message 4", "message 5", "message 6"])
+
+            bodies, older = [], response.context["older"]
+            url = reverse("messaging:conversation_history", args=[self.app.id])
+            while older:
+                data = self.client.get(url, {"before": older}).json()
+                bodies = [m["body"] for m in data["messages"]] + bodies
+                older = data["older"]
+        self.assertEqual(bodies, [f"message {i}" for i in range(4)])
+
+        outsider = User.objects.create_user(username="eve", password="pw")
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_send_and_read_publish_live_events(self):
+        with mock.patch("messaging.realtime.publish_to_user") as publish:
+            self.client.force_login(self.recruiter)
+            response = self.client.post(reverse("messaging:send_message", args=[self.app.id]),
+                                        {"body": "Are you free Monday?"}, HTTP_ACCEPT="application/json")
+            message = response.json()["message"]
+            self.assertEqual((response.status_code, message["thread"]), (201, f"app:{self.app.id}"))
+            self.assertEqual(sorted(c.args[0] for c in publish.call_args_list),
+                             sorted([self.recruiter.id, self.candidate.id]))
+
+            publish.reset_mock()
+            self.client.force_login(self.candidate)
+            self.client.post(reverse("messaging:mark_conversation_read", args=[self.app.id]))
+        publish.assert_called_once_with(self.recruiter.id, "message_read", {
+            "thread": f"app:{self.app.id}", "reader": "cam", "through": message["id"],
+        })
+
+    def test_reading_advances_watermark_only(self):
+        self.client.force_login(self.recruiter)
+        newest = Message.objects.latest("id").id
+        response = self.client.get(reverse("messaging:inbox"))
+        self.assertEqual(response.context["unread_total"], 7)
+
+        self.client.get(reverse("messaging:conversation_detail", args=[self.app.id]))
+        conv = Conversation.objects.get(application=self.app)
+        self.assertEqual((conv.recruiter_last_read_id, conv.applicant_last_read_id), (newest, 0))
+        self.assertFalse(conv.mark_read_through(self.recruiter, newest - 1))
+
+        self.assertEqual(self.client.get(reverse("messaging:inbox")).context["unread_total"], 0)
+        self.client.force_login(self.candidate)
+        response = self.client.get(reverse("messaging:conversation_detail", args=[self.app.id]))
+        self.assertEqual(response.context["seen_through"], newest)
+
+
+class DirectConversationTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pw")
+        self.bob = User.objects.create_user(username="bob", password="pw")
+
+    def test_viewing_is_read_only_until_first_message(self):
+        self.client.force_login(self.bob)
+        response = self.client.get(reverse("messaging:direct_conversation", args=["alice"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(DirectConversation.objects.exists())
+
+        for _ in range(2):
+            self.client.post(reverse("messaging:send_direct_message", args=["alice"]), {"body": "hi"})
+        conv = DirectConversation.objects.get()
+        self.assertEqual((conv.user_one, conv.user_two, conv.messages.count()), (self.alice, self.bob, 2))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DirectConversation.objects.create(user_one=self.alice, user_two=self.bob)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DirectConversation.objects.create(user_one=self.bob, user_two=self.alice)
+
+
+class MessageSearchTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user(username="rita", password="pw")
+        self.candidate = User.objects.create_user(username="cam", password="pw")
+        self.outsider = User.objects.create_user(username="eve", password="pw")
+        job = Job.objects.create(user=self.recruiter, title="Backend Dev")
+        conv = Conversation.objects.create(application=Application.objects.create(job=job, applicant=self.candidate))
+        Message.objects.bulk_create([
+            Message(conversation=conv, sender=self.candidate, body="Interview on Monday works"),
+            Message(conversation=conv, sender=self.recruiter, body="Monday interview, then a second interview <b>onsite</b>"),
+        ] + [Message(conversation=conv, sender=self.candidate, body=f"filler {i}") for i in range(3)])
+        direct = DirectConversation.objects.create(user_one=self.recruiter, user_two=self.outsider)
+        DirectMessage.objects.create(conversation=direct, sender=self.outsider, body="Any interviews this week?")
+
+    def search(self, user, q, page=1):
+        self.client.force_login(user)
+        return self.client.get(reverse("messaging:search"), {"q": q, "page": page}).json()
+
+    def test_search_is_ranked_scoped_and_paginated(self):
+        data = self.search(self.recruiter, "interview")
+        self.assertEqual(len(data["results"]), 3)
+        self.assertIn("<mark>interview</mark>", data["results"][0]["snippet"])
+        self.assertIn("&lt;b&gt;", data["results"][0]["snippet"])
+        self.assertEqual({r["kind"] for r in data["results"]}, {"application", "direct"})
+
+        self.assertEqual(len(self.search(self.candidate, "interview")["results"]), 2)
+        self.assertEqual([r["kind"] for r in self.search(self.outsider, "interview")["results"]], ["direct"])
+
+        with mock.patch("messaging.search.SEARCH_PAGE_SIZE", 2):
+            first, second = self.search(self.recruiter, "interv"), self.search(self.recruiter, "interv", page=2)
+        self.assertEqual((len(first["results"]), first["has_more"]), (2, True))
+        self.assertEqual((len(second["results"]), second["has_more"]), (1, False))
+
+        Message.objects.filter(body__startswith="Interview").delete()
+        self.assertEqual(len(self.search(self.candidate, "interview")["results"]), 1)
+
+    def test_moving_a_message_rescopes_it_in_the_index(self):
+        other = User.objects.create_user(username="olga", password="pw")
+        job = Job.objects.create(user=other, title="Frontend Dev")
+        conv = Conversation.objects.create(application=Application.objects.create(job=job, applicant=self.candidate))
+        Message.objects.filter(body__startswith="Interview").update(conversation=conv)
+
+        self.assertEqual(len(self.search(self.recruiter, "works")["results"]), 0)
+        self.assertEqual(len(self.search(other, "works")["results"]), 1)
+
+    def test_admin_and_fallback_matches(self):
+        Message.objects.bulk_create(
+            Message(conversation=Message.objects.first().conversation, sender=self.candidate, body="filler more")
+            for _ in range(5)
+        )
+        matched = Message.objects.filter(pk__in=search.matching_ids(Message, "filler"))
+        self.assertEqual(matched.count(), 8)
+        self.assertEqual(DirectMessage.objects.filter(pk__in=search.matching_ids(DirectMessage, "filler")).count(), 0)
 
-# Create your tests here.
+        hits = search._fallback_hits(self.recruiter, "filler", 3, 0)
+        newest = Message.objects.filter(body__contains="filler").order_by("-created_at", "-id")[:3]
+        self.assertEqual([pk for _, pk, _ in hits], [m.id for m in newest])
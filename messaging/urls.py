@@ -5,8 +5,13 @@ app_name = "messaging"
 
 urlpatterns = [
     path("inbox/", views.inbox, name="inbox"),
+    path("search/", views.search_messages, name="search"),
     path("app/<int:application_id>/", views.conversation_detail, name="conversation_detail"),
     path("app/<int:application_id>/send/", views.send_message, name="send_message"),
+    path("app/<int:application_id>/history/", views.conversation_history, name="conversation_history"),
+    path("app/<int:application_id>/read/", views.mark_conversation_read, name="mark_conversation_read"),
     path("user/<str:username>/", views.direct_conversation_detail, name="direct_conversation"),
     path("user/<str:username>/send/", views.send_direct_message, name="send_direct_message"),
+    path("user/<str:username>/history/", views.direct_conversation_history, name="direct_conversation_history"),
+    path("user/<str:username>/read/", views.mark_direct_read, name="mark_direct_read"),
 ]
@@ -1,7 +1,11 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 from django.contrib.auth.decorators import login_required
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import HttpResponseForbidden
+from django.urls import reverse
+from django.http import HttpResponseForbidden, JsonResponse
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 
@@ -9,9 +13,68 @@ from home.models import Application
 from .models import Conversation, Message
 
 from django.contrib.auth.models import User
+from .realtime import (
+    application_thread_key, direct_thread_key, message_payload, publish_message, publish_read,
+)
 from .models import DirectConversation, DirectMessage
+from . import search
+
+
+
+MESSAGE_PAGE_SIZE = 50
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
 
+def _message_cursor(message):
+    # Opaque keyset position "<created_at in microseconds>-<id>"
+    return f"{(message.created_at - EPOCH) // MICROSECOND}-{message.id}"
 
+def _parse_cursor(value):
+    try:
+        micros, message_id = (int(part) for part in value.split("-", 1))
+        created_at = EPOCH + micros * MICROSECOND
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    return created_at, message_id
+
+def _history_page(messages_qs, before=None, page_size=None):
+    """
+    One page of a thread, oldest first, ending just before the `before` cursor (or at
+    the newest message). Returns (messages, cursor for the next older page or None).
+    """
+    page_size = page_size or MESSAGE_PAGE_SIZE
+    cursor = _parse_cursor(before) if before else None
+    if cursor is not None:
+        created_at, message_id = cursor
+        messages_qs = messages_qs.filter(
+            models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=message_id)
+        )
+    page = list(messages_qs.select_related("sender").order_by("-created_at", "-id")[:page_size + 1])
+    has_older = len(page) > page_size
+    page = page[:page_size][::-1]
+    return page, (_message_cursor(page[0]) if has_older and page else None)
+
+def _history_json(page, older):
+    return JsonResponse({
+        "messages": [
+            {
+                "id": m.id,
+                "sender": m.sender.username,
+                "body": m.body,
+                "created_at": m.created_at.isoformat(),
+                "created_display": timezone.localtime(m.created_at).strftime("%Y-%m-%d %H:%M"),
+            }
+            for m in page
+        ],
+        "older": older,
+    })
+
+def _wants_json(request):
+    # Thread pages send messages with fetch() and render the reply themselves
+    return "application/json" in request.headers.get("Accept", "")
 
 def _can_access(user, application):
     # Only recruiter (job owner) or candidate (applicant) can access messages for this application
@@ -19,6 +82,7 @@ def _can_access(user, application):
 
 def _get_or_create_conversation(application):
     conv, _ = Conversation.objects.get_or_create(application=application)
+    conv.application = application
     return conv
 
 
@@ -31,15 +95,61 @@ def conversation_detail(request, application_id):
     if not _can_access(request.user, application):
         return HttpResponseForbidden("Not allowed")
 
-    conv = _get_or_create_conversation(application)
+    # Viewing never writes a conversation row; the first message creates it
+    conv = Conversation.objects.filter(application=application).first()
+    page, older, seen_through = [], None, None
+    if conv is not None:
+        conv.application = application
+        page, older = _history_page(conv.messages.all())
+        _mark_read_through(conv, request.user, page[-1].id if page else None, application_thread_key(application.id))
+        seen_through = conv.other_last_read_id(request.user) or None
+
+    return render(request, "messaging/conversation.html", {
+        "conv": conv, "application": application, "thread_messages": page, "older": older,
+        "thread_key": application_thread_key(application.id),
+        "seen_through": seen_through,
+    })
+
+
+def _mark_read_through(conv, user, last_id, thread_key):
+    # Read state is one watermark per participant: advance it to the newest message
+    # (a single-row UPDATE that only ever moves forward) and tell the other side.
+    if last_id is not None and conv.mark_read_through(user, last_id):
+        publish_read(conv.participants(), user, thread_key, last_id)
+
+def _newest_message_id(conv):
+    return conv.messages.aggregate(last=models.Max("id"))["last"]
 
-    # mark the other side's unread messages as read
-    Message.objects.filter(conversation=conv) \
-        .exclude(sender=request.user) \
-        .filter(read_at__isnull=True) \
-        .update(read_at=timezone.now())
 
-    return render(request, "messaging/conversation.html", {"conv": conv, "application": application})
+@login_required
+@require_POST
+def mark_conversation_read(request, application_id):
+    application = get_object_or_404(
+        Application.objects.select_related("job", "applicant"),
+        id=application_id
+    )
+    if not _can_access(request.user, application):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    conv = Conversation.objects.filter(application=application).first()
+    if conv is not None:
+        conv.application = application
+        _mark_read_through(conv, request.user, _newest_message_id(conv), application_thread_key(application.id))
+    return JsonResponse({"ok": True})
+
+
+@login_required
+def conversation_history(request, application_id):
+    application = get_object_or_404(
+        Application.objects.select_related("job", "applicant"),
+        id=application_id
+    )
+    if not _can_access(request.user, application):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+
+    page, older = _history_page(
+        Message.objects.filter(conversation__application=application), request.GET.get("before")
+    )
+    return _history_json(page, older)
 
 
 @login_required
@@ -53,17 +163,34 @@ def send_message(request, application_id):
         return HttpResponseForbidden("Not allowed")
 
     body = (request.POST.get("body") or "").strip()
+    payload = None
     if body:
         conv = _get_or_create_conversation(application)
-        Message.objects.create(conversation=conv, sender=request.user, body=body[:2000])
+        msg = Message.objects.create(conversation=conv, sender=request.user, body=body[:2000])
+        payload = message_payload(
+            msg, application_thread_key(application.id), "application", application_id=application.id
+        )
+        publish_message(conv.participants(), payload)
 
+    if _wants_json(request):
+        return JsonResponse({"message": payload}, status=201 if payload else 400)
     return redirect("messaging:conversation_detail", application_id=application.id)
 
 def _canonical_pair(u1, u2):
     # Ensure consistent ordering so we don't create duplicates
     return (u1, u2) if u1.id < u2.id else (u2, u1)
 
+def _find_direct_conv(u_current, u_other):
+    # Single probe of the unique (user_one, user_two) constraint; None until the first message
+    a, b = _canonical_pair(u_current, u_other)
+    conv = DirectConversation.objects.filter(user_one=a, user_two=b).first()
+    if conv is not None:
+        conv.user_one, conv.user_two = a, b
+    return conv
+
 def _get_or_create_direct_conv(u_current, u_other):
+    # Race-safe: when two senders insert at once, the unique constraint rejects the
+    # second row and get_or_create falls back to fetching the winner's.
     a, b = _canonical_pair(u_current, u_other)
     conv, _ = DirectConversation.objects.get_or_create(user_one=a, user_two=b)
     return conv
@@ -74,41 +201,172 @@ def _can_access_direct(user, conv: DirectConversation):
 @login_required
 def direct_conversation_detail(request, username):
     other = get_object_or_404(User, username=username)
-    conv = _get_or_create_direct_conv(request.user, other)
+    thread_key = direct_thread_key(request.user.id, other.id)
+    conv = _find_direct_conv(request.user, other)
+    page, older, seen_through = [], None, None
+    if conv is not None:
+        page, older = _history_page(conv.messages.all())
+        _mark_read_through(conv, request.user, page[-1].id if page else None, thread_key)
+        seen_through = conv.other_last_read_id(request.user) or None
 
-    # mark unread as read
-    DirectMessage.objects.filter(conversation=conv).exclude(sender=request.user)\
-        .filter(read_at__isnull=True).update(read_at=timezone.now())
+    return render(request, "messaging/direct_conversation.html", {
+        "conv": conv, "other": other, "thread_messages": page, "older": older,
+        "thread_key": thread_key, "seen_through": seen_through,
+    })
 
-    return render(request, "messaging/direct_conversation.html",
-                  {"conv": conv, "other": other})
+@login_required
+@require_POST
+def mark_direct_read(request, username):
+    other = get_object_or_404(User, username=username)
+    conv = _find_direct_conv(request.user, other)
+    if conv is not None:
+        thread_key = direct_thread_key(request.user.id, other.id)
+        _mark_read_through(conv, request.user, _newest_message_id(conv), thread_key)
+    return JsonResponse({"ok": True})
+
+@login_required
+def direct_conversation_history(request, username):
+    other = get_object_or_404(User, username=username)
+    a, b = _canonical_pair(request.user, other)
+    page, older = _history_page(
+        DirectMessage.objects.filter(conversation__user_one=a, conversation__user_two=b),
+        request.GET.get("before"),
+    )
+    return _history_json(page, older)
 
 @login_required
 @require_POST
 def send_direct_message(request, username):
     other = get_object_or_404(User, username=username)
-    conv = _get_or_create_direct_conv(request.user, other)
     body = (request.POST.get("body") or "").strip()
+    payload = None
     if body:
-        DirectMessage.objects.create(conversation=conv, sender=request.user, body=body[:2000])
+        conv = _get_or_create_direct_conv(request.user, other)
+        msg = DirectMessage.objects.create(conversation=conv, sender=request.user, body=body[:2000])
+        payload = message_payload(msg, direct_thread_key(request.user.id, other.id), "direct")
+        publish_message(conv.participants(), payload)
+
+    if _wants_json(request):
+        return JsonResponse({"message": payload}, status=201 if payload else 400)
     return redirect("messaging:direct_conversation", username=other.username)
 
+def _latest(model, field):
+    # One column of the newest message in the outer conversation
+    return models.Subquery(
+        model.objects.filter(conversation=models.OuterRef("pk"))
+        .order_by("-created_at", "-id")
+        .values(field)[:1]
+    )
+
+def _unread_for(model, user, last_read):
+    # Messages from the other side newer than this user's read watermark
+    counts = (
+        model.objects.filter(conversation=models.OuterRef("pk"), id__gt=models.OuterRef(last_read))
+        .exclude(sender=user)
+        .values("conversation")
+        .annotate(n=models.Count("id"))
+        .values("n")
+    )
+    return Coalesce(models.Subquery(counts), 0)
+
+def _with_thread_summary(queryset, message_model, user, last_read):
+    return queryset.annotate(
+        my_last_read_id=last_read,
+        last_body=_latest(message_model, "body"),
+        last_sender_id=_latest(message_model, "sender_id"),
+        last_at=_latest(message_model, "created_at"),
+        unread=_unread_for(message_model, user, "my_last_read_id"),
+    )
+
+def _my_watermark(user_field, user, mine, theirs):
+    # Which of the two watermark columns belongs to this user, per row
+    return models.Case(
+        models.When(**{user_field: user.id}, then=models.F(mine)),
+        default=models.F(theirs),
+    )
+
 @login_required
 def inbox(request):
-    apps = Application.objects.filter(
-        models.Q(applicant=request.user) | models.Q(job__user=request.user)
-    ).select_related("job", "applicant")
-    convs = Conversation.objects.filter(application__in=apps).select_related(
-        "application__job", "application__applicant"
+    # Application and direct threads in one list, newest activity first. Each queryset
+    # carries its last message and unread count as subqueries, so the page costs two
+    # queries however many threads there are.
+    convs = _with_thread_summary(
+        Conversation.objects.filter(
+            models.Q(application__applicant=request.user) | models.Q(application__job__user=request.user)
+        ).select_related("application__job__user", "application__applicant"),
+        Message, request.user,
+        _my_watermark("application__applicant_id", request.user, "applicant_last_read_id", "recruiter_last_read_id"),
+    )
+    direct_convs = _with_thread_summary(
+        DirectConversation.objects.filter(
+            models.Q(user_one=request.user) | models.Q(user_two=request.user)
+        ).select_related("user_one", "user_two"),
+        DirectMessage, request.user,
+        _my_watermark("user_one_id", request.user, "user_one_last_read_id", "user_two_last_read_id"),
     )
 
-    # Direct conversations
-    direct_convs = DirectConversation.objects.filter(
-        models.Q(user_one=request.user) | models.Q(user_two=request.user)
-    ).select_related("user_one", "user_two")
+    threads = []
+    for conv in convs:
+        app = conv.application
+        threads.append({
+            "kind": "application",
+            "url": reverse("messaging:conversation_detail", args=[app.id]),
+            "title": app.job.title,
+            "with": app.applicant.username if request.user.id != app.applicant_id else app.job.user.username,
+            "conv": conv,
+        })
+    for conv in direct_convs:
+        other = conv.user_two if conv.user_one_id == request.user.id else conv.user_one
+        threads.append({
+            "kind": "direct",
+            "url": reverse("messaging:direct_conversation", args=[other.username]),
+            "title": other.username,
+            "with": other.username,
+            "conv": conv,
+        })
+    threads.sort(key=lambda t: t["conv"].last_at or t["conv"].created_at, reverse=True)
 
     return render(
         request,
         "messaging/inbox.html",
-        {"conversations": convs, "direct_conversations": direct_convs}
+        {"threads": threads, "unread_total": sum(t["conv"].unread for t in threads)}
     )
+
+def _search_result(result, user):
+    message = result["message"]
+    if result["kind"] == search.APPLICATION:
+        app = message.conversation.application
+        url = reverse("messaging:conversation_detail", args=[app.id])
+        other = app.applicant if user.id != app.applicant_id else app.job.user
+        title = f"{app.job.title} — {other.username}"
+    else:
+        conv = message.conversation
+        other = conv.user_two if conv.user_one_id == user.id else conv.user_one
+        url = reverse("messaging:direct_conversation", args=[other.username])
+        title = other.username
+    return {
+        "kind": result["kind"],
+        "id": message.id,
+        "url": url,
+        "title": title,
+        "sender": message.sender.username,
+        "snippet": result["snippet"],
+        "created_at": message.created_at.isoformat(),
+        "created_display": timezone.localtime(message.created_at).strftime("%Y-%m-%d %H:%M"),
+    }
+
+@login_required
+def search_messages(request):
+    # Ranked full-text search over the user's own threads; ?q=...&page=N
+    query = (request.GET.get("q") or "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    results, has_more = search.search_messages(request.user, query, page=page) if query else ([], False)
+    return JsonResponse({
+        "query": query,
+        "page": page,
+        "has_more": has_more,
+        "results": [_search_result(r, request.user) for r in results],
+    })